@@ -0,0 +1,199 @@
+# database.py - Async MongoDB data layer
+from pymongo import AsyncMongoClient
+from bson.objectid import ObjectId
+from fastapi.requests import HTTPConnection
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import os
+
+
+# =====================
+# Repositories
+# =====================
+
+# Users listing never returns the password hash; the unbounded history arrays are opt-in
+USER_LIST_PROJECTION = {"password": 0, "quiz_completions": 0, "analysis_history": 0}
+USER_LIST_WITH_HISTORY_PROJECTION = {"password": 0}
+MAX_USERS_PAGE_SIZE = 200
+
+
+def _user_list_projection(include_history: bool) -> Dict[str, Any]:
+    return USER_LIST_WITH_HISTORY_PROJECTION if include_history else USER_LIST_PROJECTION
+
+
+class UsersRepository:
+    """Data access for the users collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def find_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"email": email})
+
+    async def find_by_id(self, user_oid: ObjectId, projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": user_oid}, projection)
+
+    async def exists(self, user_oid: ObjectId) -> bool:
+        return await self.collection.find_one({"_id": user_oid}, {"_id": 1}) is not None
+
+    async def create(self, user: Dict[str, Any]) -> ObjectId:
+        result = await self.collection.insert_one(user)
+        return result.inserted_id
+
+    async def update(self, user_oid: ObjectId, fields: Dict[str, Any]) -> int:
+        result = await self.collection.update_one({"_id": user_oid}, {"$set": fields})
+        return result.matched_count
+
+    async def delete(self, user_oid: ObjectId) -> int:
+        result = await self.collection.delete_one({"_id": user_oid})
+        return result.deleted_count
+
+    async def find_page(self, after: Optional[ObjectId] = None, limit: int = 50, include_history: bool = False) -> List[Dict[str, Any]]:
+        """Return one page of users ordered by _id, starting after the given ID"""
+        query = {"_id": {"$gt": after}} if after is not None else {}
+        limit = max(1, min(limit, MAX_USERS_PAGE_SIZE))
+        cursor = self.collection.find(query, _user_list_projection(include_history)).sort("_id", 1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    def stream(self, include_history: bool = False, batch_size: int = 200):
+        """Return an async cursor over all users, fetched in bounded batches"""
+        return self.collection.find({}, _user_list_projection(include_history), batch_size=batch_size)
+
+    async def push_quiz_completion(self, user_oid: ObjectId, completion: Dict[str, Any]) -> None:
+        await self.collection.update_one({"_id": user_oid}, {"$push": {"quiz_completions": completion}})
+
+    async def push_analysis_result(self, user_oid: ObjectId, result_id: str) -> None:
+        await self.collection.update_one({"_id": user_oid}, {"$push": {"analysis_history": result_id}})
+
+
+class QuizzesRepository:
+    """Data access for the quizzes collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def find_by_id(self, quiz_id: int, projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"id": quiz_id}, projection)
+
+    async def insert_many(self, quiz_data: List[Dict[str, Any]]) -> int:
+        result = await self.collection.insert_many(quiz_data)
+        return len(result.inserted_ids)
+
+
+MAX_HISTORY_PAGE_SIZE = 100
+
+
+class AnalysisResultsRepository:
+    """Data access for the analysis_results collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def create(self, analysis_result: Dict[str, Any]) -> ObjectId:
+        result = await self.collection.insert_one(analysis_result)
+        return result.inserted_id
+
+    async def find_history(self, user_id: str, before: Optional[datetime] = None, before_id: Optional[ObjectId] = None,
+                           limit: int = 20, projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Return one page of a user's analysis results, newest first.
+
+        Uses keyset pagination on (date, _id): pass the date and _id of the
+        last result of the previous page as `before` and `before_id` to get
+        the next page. _id orders results saved with the same date, so none
+        are skipped or repeated at a page boundary.
+        """
+        query = {"user_id": user_id}
+        if before is not None and before_id is not None:
+            query["$or"] = [{"date": {"$lt": before}}, {"date": before, "_id": {"$lt": before_id}}]
+        elif before is not None:
+            query["date"] = {"$lt": before}
+
+        limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+        cursor = self.collection.find(query, projection).sort([("date", -1), ("_id", -1)]).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def find_metrics(self, batch_size: int = 1000) -> List[Dict[str, Any]]:
+        """Return the stored scoring metrics of every result that has them"""
+        cursor = self.collection.find({"metrics": {"$exists": True}}, {"_id": 0, "metrics": 1}, batch_size=batch_size)
+        return [document["metrics"] async for document in cursor]
+
+
+class UserResponsesRepository:
+    """Data access for the user_responses collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def create(self, response_document: Dict[str, Any]) -> ObjectId:
+        result = await self.collection.insert_one(response_document)
+        return result.inserted_id
+
+
+class ParentAssessmentsRepository:
+    """Data access for the parent_assessments collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def create(self, assessment: Dict[str, Any]) -> ObjectId:
+        result = await self.collection.insert_one(assessment)
+        return result.inserted_id
+
+    async def find_by_user(self, user_id: str, before: Optional[datetime] = None, limit: int = 20,
+                           projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Return one page of a user's parent assessments, newest first (keyset pagination on created_at)"""
+        query = {"user_id": user_id}
+        if before is not None:
+            query["created_at"] = {"$lt": before}
+
+        limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+        cursor = self.collection.find(query, projection).sort("created_at", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+
+# =====================
+# Connection Management
+# =====================
+
+def pool_options_from_env() -> Dict[str, Any]:
+    """Read connection pool tuning from the environment"""
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", 100)),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", 0)),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 60000)),
+        "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000)),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+    }
+
+
+class Database:
+    """
+    Owns the async MongoDB client and exposes one repository per collection.
+
+    Created once in the application lifespan; every route receives it through
+    the get_db dependency so no handler touches a blocking driver.
+    """
+
+    def __init__(self, uri: Optional[str] = None, name: str = "dyslexia_db", **pool_options):
+        options = pool_options_from_env()
+        options.update(pool_options)
+        self.client = AsyncMongoClient(uri or os.getenv("MONGO_URI"), **options)
+        self.db = self.client[name]
+        self.users = UsersRepository(self.db["users"])
+        self.quizzes = QuizzesRepository(self.db["quizzes"])
+        self.analysis_results = AnalysisResultsRepository(self.db["analysis_results"])
+        self.user_responses = UserResponsesRepository(self.db["user_responses"])
+        self.parent_assessments = ParentAssessmentsRepository(self.db["parent_assessments"])
+
+    async def connect(self) -> None:
+        """Verify the server is reachable"""
+        await self.client.admin.command("ping")
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+def get_db(connection: HTTPConnection) -> Database:
+    """FastAPI dependency returning the Database created in the lifespan"""
+    return connection.app.state.db
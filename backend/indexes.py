@@ -0,0 +1,123 @@
+# indexes.py - Declarative index bootstrap and query-plan checks
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from bson.objectid import ObjectId
+from datetime import datetime
+from typing import Any, Dict, List
+import argparse
+import asyncio
+
+from database import Database
+
+# Indexes the repositories in database.py depend on, per collection
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ],
+    "quizzes": [
+        IndexModel([("id", ASCENDING)], name="quiz_id"),
+    ],
+    "user_responses": [
+        IndexModel([("user_id", ASCENDING), ("completed_at", DESCENDING)], name="user_id_completed_at"),
+    ],
+    "analysis_results": [
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], name="user_id_date_id"),
+    ],
+    "parent_assessments": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_created_at"),
+    ],
+}
+
+# One representative shape for each repository query: (collection, filter, sort)
+QUERY_PLAN_CHECKS = [
+    ("users", {"email": "check@example.com"}, None),
+    ("quizzes", {"id": 1}, None),
+    ("analysis_results", {"user_id": "000000000000000000000000"}, [("date", DESCENDING), ("_id", DESCENDING)]),
+    ("analysis_results", {"user_id": "000000000000000000000000", "date": {"$lt": datetime(2100, 1, 1)}}, [("date", DESCENDING), ("_id", DESCENDING)]),
+    ("analysis_results", {"user_id": "000000000000000000000000", "$or": [
+        {"date": {"$lt": datetime(2100, 1, 1)}},
+        {"date": datetime(2100, 1, 1), "_id": {"$lt": ObjectId("ffffffffffffffffffffffff")}},
+    ]}, [("date", DESCENDING), ("_id", DESCENDING)]),
+    ("parent_assessments", {"user_id": "000000000000000000000000"}, [("created_at", DESCENDING)]),
+]
+
+
+async def ensure_indexes(db: Database) -> None:
+    """Create every declared index and verify it exists afterwards"""
+    for collection_name, index_models in INDEXES.items():
+        collection = db.db[collection_name]
+        await collection.create_indexes(index_models)
+
+        existing = await collection.index_information()
+        for index_model in index_models:
+            name = index_model.document["name"]
+            if name not in existing:
+                raise RuntimeError(f"Index {collection_name}.{name} is missing after creation")
+            existing_keys = list(existing[name]["key"])
+            if existing_keys != list(index_model.document["key"].items()):
+                raise RuntimeError(f"Index {collection_name}.{name} has unexpected keys: {existing_keys}")
+
+    print(f"MongoDB indexes verified for {len(INDEXES)} collections")
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Collect every stage name in an explain() plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def check_query_plans(db: Database) -> List[Dict[str, Any]]:
+    """
+    Run explain() on each repository query.
+
+    Returns a list of failures, one per query whose winning plan falls back
+    to a collection scan. An empty list means every query is index-backed.
+    """
+    failures = []
+    for collection_name, query, sort in QUERY_PLAN_CHECKS:
+        cursor = db.db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+
+        stages = _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        if "COLLSCAN" in stages:
+            failures.append({"collection": collection_name, "query": query, "stages": stages})
+
+    return failures
+
+
+async def _main(check: bool) -> int:
+    db = Database()
+    try:
+        await db.connect()
+        await ensure_indexes(db)
+        if not check:
+            return 0
+
+        failures = await check_query_plans(db)
+        for failure in failures:
+            print(f"COLLSCAN on {failure['collection']} for query {failure['query']}: {failure['stages']}")
+        if failures:
+            return 1
+        print(f"All {len(QUERY_PLAN_CHECKS)} repository queries use an index")
+        return 0
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Create MongoDB indexes and optionally verify query plans")
+    parser.add_argument("--check", action="store_true", help="fail if any repository query uses a collection scan")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.check)))
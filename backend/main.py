@@ -1,30 +1,109 @@
 # app.py - Main FastAPI application
-from fastapi import FastAPI, HTTPException, Depends, Form, Query, Body, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Depends, Form, Query, Body, BackgroundTasks, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, EmailStr
-from pymongo import MongoClient
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, EmailStr, Field
 from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
+from typing import Annotated, List, Dict, Any, Optional
 import bcrypt
+import csv
+import io
 import os
 import json
+import math
 import asyncio
+import functools
+import re
+import stat
+import time
 import uvicorn
 
 # Import the DyslexiaAnalysisSystem class
 from models.dyslexia_system import DyslexiaAnalysisSystem
+from models.sessions import AnalysisSessionManager, NoDeviceAvailable
+from models.preview import PreviewStream
+from models.capture import ClientFrameFormat, decode_frame
+from models.audio_features import IncrementalAudioAnalyzer
+from models.scoring import extract_metrics
+from models.report_cache import ReportCache, report_cache_key
+from models.visualization import VisualizationRenderer, chart_spec, render_report_svg
+from models.artifacts import get_artifact_store
+from models.artifact_responses import IMMUTABLE_CACHE_CONTROL, ArtifactFileResponse, etag_matches, not_modified
+from models.parents import (
+    CHILD_AGE_MAX, CHILD_AGE_MIN, MAX_CHILD_NAME_LENGTH, RESPONSE_MAX, RESPONSE_MIN, analyze_dyslexia_responses,
+    generate_recommendations, get_question_bank, read_responses_csv, read_responses_json, responses_cache_key,
+    score_responses_batch
+)
+from models.rules import RULES_VERSION
+from database import Database, MAX_HISTORY_PAGE_SIZE, MAX_USERS_PAGE_SIZE, get_db
+from responses import DocumentView, MongoJSONResponse, dumps
+from indexes import ensure_indexes, check_query_plans
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # MongoDB Setup with improved error handling
+    # Blocking capture, CV and rendering work runs here instead of on the event loop
+    app.state.analysis_executor = ThreadPoolExecutor(
+        max_workers=int(os.getenv("ANALYSIS_MAX_WORKERS", 4)),
+        thread_name_prefix="analysis"
+    )
+    # Client frames are decoded on their own workers so busy analyzers never starve them
+    app.state.decode_executor = ThreadPoolExecutor(
+        max_workers=int(os.getenv("ANALYSIS_DECODE_WORKERS", 2)),
+        thread_name_prefix="frame-decode"
+    )
+    # Report charts are drawn in the background (or on first fetch), never on the request path
+    app.state.render_executor = ThreadPoolExecutor(
+        max_workers=int(os.getenv("VISUALIZATION_RENDER_WORKERS", 2)),
+        thread_name_prefix="chart-render"
+    )
+    # Recordings and charts share one store; the sweeper keeps its disk usage bounded
+    app.state.artifacts = get_artifact_store("dyslexia_analysis_results")
+    app.state.artifacts.start_sweeper(interval=int(os.getenv("ARTIFACT_SWEEP_INTERVAL_SECONDS", 600)))
+    app.state.visualizations = VisualizationRenderer(app.state.artifacts, app.state.render_executor)
+
+    app.state.db = Database()
+    try:
+        await app.state.db.connect()
+        print("MongoDB connection successful")
+    except Exception as e:
+        print(f"MongoDB connection error: {e}")
+    else:
+        try:
+            await ensure_indexes(app.state.db)
+        except Exception as e:
+            print(f"MongoDB index creation error: {e}")
+
+    # Optionally refuse to start if any repository query would scan a whole collection
+    if os.getenv("MONGO_CHECK_QUERY_PLANS") == "1":
+        failures = await check_query_plans(app.state.db)
+        if failures:
+            raise RuntimeError(f"Repository queries without index support: {failures}")
+    yield
+    await app.state.db.close()
+    app.state.analysis_executor.shutdown(wait=False, cancel_futures=True)
+    app.state.decode_executor.shutdown(wait=False, cancel_futures=True)
+    app.state.render_executor.shutdown(wait=False, cancel_futures=True)
+    app.state.artifacts.stop_sweeper()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Dyslexia No More", 
     description="A comprehensive platform for dyslexia assessment and support",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=MongoJSONResponse
 )
 
 # Enable CORS
@@ -36,29 +115,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# MongoDB Setup with improved error handling
-try:
-    client = MongoClient(os.getenv("MONGO_URI"), serverSelectionTimeoutMS=5000)
-    # Test the connection
-    client.server_info()
-    print("MongoDB connection successful")
-    db = client["dyslexia_db"]
-    users = db["users"]
-    quizzes = db["quizzes"]
-    analysis_results = db["analysis_results"]
-    user_responses = db["user_responses"] 
-except Exception as e:
-    print(f"MongoDB connection error: {e}")
-
-# Initialize the dyslexia analysis system
-analysis_system = DyslexiaAnalysisSystem()
+@app.exception_handler(RequestValidationError)
+async def request_validation_error(request: Request, exc: RequestValidationError):
+    """FastAPI's 422 response, encoded with orjson so rejected NaN or Infinity inputs echo back as null"""
+    return MongoJSONResponse(status_code=422, content={"detail": jsonable_encoder(exc.errors())})
+
+# Stateless report and visualization helpers for simulated analyses
+report_system = DyslexiaAnalysisSystem(headless=True)
+
+# Reports (and their charts) for identical simulated inputs are generated once
+simulate_cache = ReportCache(
+    max_entries=int(os.getenv("SIMULATE_CACHE_MAX_ENTRIES", 256)),
+    max_age=int(os.getenv("SIMULATE_CACHE_MAX_AGE_SECONDS", 3600))
+)
+
+# Each /ws/analyze connection gets its own session with leased capture devices
+session_manager = AnalysisSessionManager()
+
+# Bounds for the rate of the optional annotated preview stream requested by clients
+MIN_PREVIEW_FPS = 0.1
+MAX_PREVIEW_FPS = 5
+
+# Client frames waiting to be decoded per connection; older ones are dropped beyond this
+CLIENT_FRAME_QUEUE_SIZE = 4
+
+# First byte of every binary client message says what the rest of it carries
+CLIENT_VIDEO_FRAME = 0x01
+CLIENT_AUDIO_CHUNK = 0x02
 
 # Create directory for visualizations
 if not os.path.exists("dyslexia_analysis_results"):
     os.makedirs("dyslexia_analysis_results")
 
-# Mount static files directory for visualizations
-app.mount("/visualizations", StaticFiles(directory="dyslexia_analysis_results"), name="visualizations")
+# Questionnaire results for identical response sets are computed once per question bank and rules version
+parent_assessment_cache = ReportCache(
+    max_entries=int(os.getenv("PARENT_CACHE_MAX_ENTRIES", 1024)),
+    max_age=int(os.getenv("PARENT_CACHE_MAX_AGE_SECONDS", 3600))
+)
+
+# Largest parent questionnaire batch accepted in one upload
+MAX_PARENT_BATCH_ROWS = int(os.getenv("MAX_PARENT_BATCH_ROWS", 100000))
+
+# Largest parent questionnaire upload read, in bytes; larger bodies are refused before parsing
+MAX_PARENT_BATCH_BYTES = int(os.getenv("MAX_PARENT_BATCH_BYTES", 16 * 1024 * 1024))
+
+# Scored batch rows serialized per streamed chunk
+PARENT_BATCH_CHUNK_ROWS = 500
+
+# Ids handed out by VisualizationRenderer
+VISUALIZATION_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
 
 # =====================
 # Pydantic Models
@@ -121,6 +226,8 @@ class AnalysisRequest(BaseModel):
     duration: int = 10
     simulate: bool = False
     user_id: Optional[str] = None
+    # png: rendered chart at visualization_url; spec: chart data for the client to draw; svg: inline SVG
+    visualization: str = Field("png", pattern="^(png|spec|svg)$")
 
 class AnalysisResponse(BaseModel):
     indicators: List[str]
@@ -129,7 +236,10 @@ class AnalysisResponse(BaseModel):
     risk_level: str
     confidence_percentage: float
     reading_profile: Dict[str, List[str]]
+    visualization_id: Optional[str] = None
     visualization_url: Optional[str] = None
+    chart_spec: Optional[Dict[str, Any]] = None
+    visualization_svg: Optional[str] = None
     
 # Add this new model for quiz completion data
 class QuizCompletion(BaseModel):
@@ -138,6 +248,94 @@ class QuizCompletion(BaseModel):
     correctAnswers: int
     totalQuestions: int
 
+# Parent Questionnaire Models
+class ParentAssessmentRequest(BaseModel):
+    child_name: str = Field(..., max_length=MAX_CHILD_NAME_LENGTH)
+    child_age: int = Field(..., ge=CHILD_AGE_MIN, le=CHILD_AGE_MAX)
+    # Question id -> response value, range-checked like batch uploads (check_response)
+    responses: Dict[str, Annotated[float, Field(ge=RESPONSE_MIN, le=RESPONSE_MAX, allow_inf_nan=False)]]
+    user_id: Optional[str] = None
+
+# Response Models
+# Read from Mongo documents by DocumentView: validation_alias is the document key a field comes from
+class QuizCompletionRecord(BaseModel):
+    quiz_id: Optional[int] = None
+    score_percentage: Optional[int] = None
+    completed_at: Optional[datetime] = None
+
+class ProfileResponse(BaseModel):
+    id: str = Field(validation_alias="_id")
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    dob: Optional[str] = None
+    profile_photo: Optional[str] = None
+    language: Optional[str] = None
+    about: Optional[str] = None
+    created_at: Optional[datetime] = None
+    quiz_progress: Optional[List[Any]] = None
+    quiz_completions: Optional[List[QuizCompletionRecord]] = None
+    analysis_history: Optional[List[str]] = None
+
+class UsersPage(BaseModel):
+    items: List[ProfileResponse]
+    next_after: Optional[str] = None
+
+class QuizSubmissionResponse(BaseModel):
+    message: str
+    score_percentage: int
+    quiz_id: Optional[int] = None
+    completed_at: datetime
+
+class AnalysisHistoryItem(BaseModel):
+    id: str = Field(alias="_id")
+    user_id: str
+    date: datetime
+    type: Optional[str] = None
+    report: Dict[str, Any]
+    metrics: Optional[Dict[str, float]] = None
+
+class AnalysisHistoryPage(BaseModel):
+    items: List[AnalysisHistoryItem]
+    next_before: Optional[str] = None
+    next_before_id: Optional[str] = None
+
+class ParentAssessmentItem(BaseModel):
+    id: str = Field(alias="_id")
+    user_id: str
+    child_name: str
+    child_age: int
+    overall_score: float
+    category_scores: Dict[str, float]
+    severity_level: str
+    question_bank: Optional[str] = None
+    rules_version: Optional[int] = None
+    created_at: datetime
+
+class ParentHistoryPage(BaseModel):
+    items: List[ParentAssessmentItem]
+    next_before: Optional[str] = None
+
+PROFILE_VIEW = DocumentView(ProfileResponse)
+QUIZ_VIEW = DocumentView(Quiz)
+ANALYSIS_HISTORY_VIEW = DocumentView(AnalysisHistoryItem)
+PARENT_HISTORY_VIEW = DocumentView(ParentAssessmentItem)
+
+# Report fields kept in the summary view of analysis history
+HISTORY_SUMMARY_REPORT_FIELDS = (
+    "dyslexia_likelihood_percentage", "risk_level", "confidence_percentage", "visualization_id", "visualization_url"
+)
+
+# Projections of the analysis history views: full fetches every AnalysisHistoryItem field,
+# summary only the headline numbers of the report and no metrics
+HISTORY_PROJECTIONS = {
+    "full": ANALYSIS_HISTORY_VIEW.projection,
+    "summary": {
+        **{source: 1 for source in ANALYSIS_HISTORY_VIEW.projection if source not in ("report", "metrics")},
+        **{f"report.{field}": 1 for field in HISTORY_SUMMARY_REPORT_FIELDS},
+    },
+}
+
 # =====================
 # Routes - Core API
 # =====================
@@ -151,11 +349,12 @@ def home():
 # =====================
 
 @app.post("/signup")
-def signup(data: SignupRequest):
-    if users.find_one({"email": data.email}):
+async def signup(data: SignupRequest, db: Database = Depends(get_db)):
+    if await db.users.find_by_email(data.email):
         raise HTTPException(status_code=409, detail="User already exists")
     
-    hashed_pw = bcrypt.hashpw(data.password.encode('utf-8'), bcrypt.gensalt())
+    # bcrypt is CPU-bound, keep it off the event loop
+    hashed_pw = await run_in_threadpool(bcrypt.hashpw, data.password.encode('utf-8'), bcrypt.gensalt())
 
     user = {
         "name": data.name,
@@ -171,16 +370,20 @@ def signup(data: SignupRequest):
         "analysis_history": []
     }
 
-    result = users.insert_one(user)
+    # The unique email index settles a concurrent signup that passed the check above
+    try:
+        user_oid = await db.users.create(user)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="User already exists")
     return {
         "message": "User created",
-        "id": str(result.inserted_id)
+        "id": str(user_oid)
     }
 
 @app.post("/login")
-def login(data: LoginRequest):
-    user = users.find_one({"email": data.email})
-    if not user or not bcrypt.checkpw(data.password.encode('utf-8'), user["password"]):
+async def login(data: LoginRequest, db: Database = Depends(get_db)):
+    user = await db.users.find_by_email(data.email)
+    if not user or not await run_in_threadpool(bcrypt.checkpw, data.password.encode('utf-8'), user["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     return {
@@ -188,22 +391,23 @@ def login(data: LoginRequest):
         "user_id": str(user["_id"])  
     }
 
-@app.get("/profile")
-def get_profile(user_id: str = Query(..., description="User ID from MongoDB")):
+@app.get("/profile", response_model=ProfileResponse)
+async def get_profile(user_id: str = Query(..., description="User ID from MongoDB"), db: Database = Depends(get_db)):
     try:
-        user = users.find_one({"_id": ObjectId(user_id)})
+        user_oid = ObjectId(user_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid user ID")
 
+    # The projection never fetches the password hash
+    user = await db.users.find_by_id(user_oid, PROFILE_VIEW.projection)
+
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.pop("password")  # Don't expose password hash
-    user["id"] = str(user.pop("_id"))
-    return user
+    return MongoJSONResponse(PROFILE_VIEW.convert(user))
 
 @app.put("/update_profile")
-def update_profile(user_id: str = Query(..., description="User ID to update"), data: UpdateUserRequest = Body(...)):
+async def update_profile(user_id: str = Query(..., description="User ID to update"), data: UpdateUserRequest = Body(...), db: Database = Depends(get_db)):
     try:
         oid = ObjectId(user_id)
     except Exception:
@@ -213,33 +417,52 @@ def update_profile(user_id: str = Query(..., description="User ID to update"), d
     if not update_data:
         raise HTTPException(status_code=400, detail="No data provided for update")
 
-    result = users.update_one({"_id": oid}, {"$set": update_data})
-    if result.matched_count == 0:
+    matched_count = await db.users.update(oid, update_data)
+    if matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
 
     return {"message": "User updated successfully"}
 
 @app.delete("/delete_user")
-def delete_user(user_id: str = Query(...)):
+async def delete_user(user_id: str = Query(...), db: Database = Depends(get_db)):
     try:
         oid = ObjectId(user_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid user ID")
 
-    result = users.delete_one({"_id": oid})
-    if result.deleted_count == 0:
+    deleted_count = await db.users.delete(oid)
+    if deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
 
     return {"message": "User deleted successfully"}
 
-@app.get("/users")
-def get_all_users():
-    all_users = []
-    for user in users.find():
-        user.pop("password", None)
-        user["id"] = str(user.pop("_id"))
-        all_users.append(user)
-    return all_users
+@app.get("/users", response_model=UsersPage)
+async def get_all_users(
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json for cursor-paginated pages, ndjson to stream every user"),
+    after: Optional[str] = Query(None, description="ID of the last user on the previous page"),
+    limit: int = Query(50, ge=1, le=MAX_USERS_PAGE_SIZE, description="Page size"),
+    include_history: bool = Query(False, description="Include quiz_completions and analysis_history arrays"),
+    db: Database = Depends(get_db)
+):
+    """List users, either one page at a time or as an NDJSON stream"""
+    if format == "ndjson":
+        async def stream_users():
+            async for user in db.users.stream(include_history=include_history):
+                yield dumps(PROFILE_VIEW.convert(user)) + b"\n"
+
+        return StreamingResponse(stream_users(), media_type="application/x-ndjson")
+
+    try:
+        after_oid = ObjectId(after) if after else None
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    page = await db.users.find_page(after=after_oid, limit=limit, include_history=include_history)
+
+    return MongoJSONResponse({
+        "items": PROFILE_VIEW.convert_many(page),
+        "next_after": str(page[-1]["_id"]) if len(page) == limit else None
+    })
 
 # =====================
 # Routes - Quiz Management
@@ -281,23 +504,21 @@ def get_quizzes():
     
     return quiz_summaries
 
-@app.get("/quiz/{quiz_id}")
-def get_quiz(quiz_id: int):
+@app.get("/quiz/{quiz_id}", response_model=Quiz)
+async def get_quiz(quiz_id: int, db: Database = Depends(get_db)):
     """Get a specific quiz by ID with all questions"""
-    print(f"Looking for quiz with ID: {quiz_id}, type: {type(quiz_id)}")
-    quiz = quizzes.find_one({"id": quiz_id})
-    print(f"Found quiz: {quiz}")
+    quiz = await db.quizzes.find_by_id(quiz_id, QUIZ_VIEW.projection)
     if not quiz:
         raise HTTPException(status_code=404, detail=f"Quiz with ID {quiz_id} not found")
-    return quiz
+    return MongoJSONResponse(QUIZ_VIEW.convert(quiz))
 
 @app.post("/init_quizzes")
-def initialize_quizzes():
+async def initialize_quizzes(db: Database = Depends(get_db)):
     """Initialize the database with quiz data"""
     quiz_data = [ ]  # Add your quiz data here
     if quiz_data:
         # Insert quiz data
-        quizzes.insert_many(quiz_data)
+        await db.quizzes.insert_many(quiz_data)
         return {"message": f"Initialized {len(quiz_data)} quizzes"}
     return {"message": "No quiz data to initialize"}
 
@@ -340,10 +561,11 @@ def initialize_quizzes():
     
 #     return {"message": "Quiz results submitted successfully"}
 
-@app.post("/quiz/submit")
-def submit_quiz_result(
+@app.post("/quiz/submit", response_model=QuizSubmissionResponse)
+async def submit_quiz_result(
     user_id: str = Query(..., description="User ID from MongoDB"),
-    quiz_data: dict = Body(...)
+    quiz_data: dict = Body(...),
+    db: Database = Depends(get_db)
 ):
     """Submit quiz results for a user with user_id as query parameter"""
     try:
@@ -352,12 +574,11 @@ def submit_quiz_result(
         raise HTTPException(status_code=400, detail="Invalid user ID")
 
     # Check if user exists
-    user = users.find_one({"_id": user_oid})
-    if not user:
+    if not await db.users.exists(user_oid):
         raise HTTPException(status_code=404, detail="User not found")
 
     # Check if quiz exists
-    quiz = quizzes.find_one({"id": quiz_data.get("quizId")})
+    quiz = await db.quizzes.find_by_id(quiz_data.get("quizId"))
     if not quiz:
         raise HTTPException(status_code=404, detail=f"Quiz with ID {quiz_data.get('quizId')} not found")
     
@@ -377,35 +598,48 @@ def submit_quiz_result(
     }
     
     # Insert into the user_responses collection
-    user_responses.insert_one(response_document)
+    await db.user_responses.create(response_document)
     
     # Update the user document for quick access to user's quiz history
-    users.update_one(
-        {"_id": user_oid},
+    await db.users.push_quiz_completion(
+        user_oid,
         {
-            "$push": {
-                "quiz_completions": {
-                    "quiz_id": quiz_data.get("quizId"),
-                    "score_percentage": score_percentage,
-                    "completed_at": response_document["completed_at"]
-                }
-            }
+            "quiz_id": quiz_data.get("quizId"),
+            "score_percentage": score_percentage,
+            "completed_at": response_document["completed_at"]
         }
     )
     
-    return {
+    return MongoJSONResponse({
         "message": "Quiz results submitted successfully",
         "score_percentage": score_percentage,
         "quiz_id": quiz_data.get("quizId"),
-        "completed_at": response_document["completed_at"].isoformat()
-    }
+        "completed_at": response_document["completed_at"]
+    })
 
 # =====================
 # Routes - Dyslexia Analysis
 # =====================
 
+def add_visualization(report, facial_data, audio_data, eye_data, mode="png"):
+    """
+    Attach the report's charts in the requested form: a chart spec or an
+    inline SVG (both built in microseconds), or a PNG rendered in the
+    background and linked by id.
+    """
+    if mode == "spec":
+        report["chart_spec"] = chart_spec(facial_data, audio_data, eye_data, report)
+        return
+    if mode == "svg":
+        report["visualization_svg"] = render_report_svg(chart_spec(facial_data, audio_data, eye_data, report))
+        return
+    
+    chart_id = app.state.visualizations.submit(facial_data, audio_data, eye_data, report)
+    report["visualization_id"] = chart_id
+    report["visualization_url"] = f"/visualizations/{chart_id}"
+
 @app.post("/analyze/simulate", response_model=AnalysisResponse)
-async def simulate_analysis(request: AnalysisRequest = Body(...)):
+async def simulate_analysis(request: AnalysisRequest = Body(...), db: Database = Depends(get_db)):
     """Endpoint to run a simulated analysis without camera/audio"""
     try:
         # Generate simulated data
@@ -446,15 +680,16 @@ async def simulate_analysis(request: AnalysisRequest = Body(...)):
             "reading_efficiency_score": 52.0
         }
         
-        # Generate report
-        report = analysis_system.generate_dyslexia_analysis_report(facial_data, audio_data, eye_data)
-        
-        # Create visualization
-        visualization_file = analysis_system.visualize_results(facial_data, audio_data, eye_data, report)
+        # Reuse the report and chart for inputs that were already scored by this scoring version
+        cache_key = report_cache_key(facial_data, audio_data, eye_data)
+        report = simulate_cache.get(cache_key)
+        if report is None:
+            # Generate report
+            report = report_system.generate_dyslexia_analysis_report(facial_data, audio_data, eye_data)
+            simulate_cache.put(cache_key, report)
         
-        # Add visualization URL if available
-        if visualization_file:
-            report["visualization_url"] = f"/visualizations/{os.path.basename(visualization_file)}"
+        # Attach the charts; PNGs are rendered in the background and identical reports share one
+        add_visualization(report, facial_data, audio_data, eye_data, request.visualization)
         
         # If user_id is provided, save the result
         if request.user_id:
@@ -465,17 +700,15 @@ async def simulate_analysis(request: AnalysisRequest = Body(...)):
                     "user_id": request.user_id,
                     "date": datetime.utcnow(),
                     "report": report,
+                    "metrics": extract_metrics(facial_data, audio_data, eye_data),
                     "type": "simulated"
                 }
                 
                 # Save to analysis_results collection
-                result_id = analysis_results.insert_one(analysis_result).inserted_id
+                result_id = await db.analysis_results.create(analysis_result)
                 
                 # Update user's analysis history
-                users.update_one(
-                    {"_id": user_oid},
-                    {"$push": {"analysis_history": str(result_id)}}
-                )
+                await db.users.push_analysis_result(user_oid, str(result_id))
             except Exception as e:
                 print(f"Error saving analysis result: {e}")
         
@@ -484,40 +717,207 @@ async def simulate_analysis(request: AnalysisRequest = Body(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/analysis/history/{user_id}")
-async def get_analysis_history(user_id: str):
-    """Get analysis history for a specific user"""
-    try:
-        user_oid = ObjectId(user_id)
-        
-        # Find user to get analysis history IDs
-        user = users.find_one({"_id": user_oid})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Get analysis history IDs
-        history_ids = user.get("analysis_history", [])
-        
-        # Get analysis results
-        history = []
-        for result_id in history_ids:
-            try:
-                result = analysis_results.find_one({"_id": ObjectId(result_id)})
-                if result:
-                    result["_id"] = str(result["_id"])
-                    history.append(result)
-            except Exception as e:
-                print(f"Error fetching analysis result {result_id}: {e}")
-        
-        return history
+@app.get("/analyze/simulate/cache")
+async def simulate_cache_stats():
+    """Hit, miss and eviction counters of the simulated report cache"""
+    return simulate_cache.stats()
+
+@app.get("/visualizations/{name}")
+@app.head("/visualizations/{name}", include_in_schema=False)
+async def get_visualization(name: str, request: Request):
+    """Serve a report chart by id, rendering it first if it has not been drawn yet"""
+    if VISUALIZATION_ID_PATTERN.fullmatch(name):
+        # The id is a hash of the chart's content, so a client holding it is always current
+        etag = f'"{name}"'
+        if etag_matches(request.headers, etag):
+            return not_modified(etag, IMMUTABLE_CACHE_CONTROL)
+        path = await run_in_threadpool(app.state.visualizations.ensure, name)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Visualization not found")
+        key = app.state.visualizations.key_for(name)
+        return ArtifactFileResponse.for_request(request, path, key, os.stat(path), etag=etag, media_type="image/png")
     
+    # Charts and recordings saved under their own keys
+    # Temporary files and recordings still being written are never served
+    if not app.state.artifacts.is_finished(name):
+        raise HTTPException(status_code=404, detail="Visualization not found")
+    path = app.state.artifacts.path_for(name)
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Visualization not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="Visualization not found")
+    return ArtifactFileResponse.for_request(request, path, name, stat_result)
+
+@app.get("/analysis/history/{user_id}", response_model=AnalysisHistoryPage)
+async def get_analysis_history(
+    user_id: str,
+    before: Optional[datetime] = Query(None, description="Only return results older than this date (date of the last item on the previous page)"),
+    before_id: Optional[str] = Query(None, description="_id of the last item on the previous page; breaks ties between results with the same date"),
+    limit: int = Query(20, ge=1, le=MAX_HISTORY_PAGE_SIZE, description="Page size"),
+    view: str = Query("summary", pattern="^(summary|full)$", description="summary or full report"),
+    db: Database = Depends(get_db)
+):
+    """Get one page of analysis history for a specific user, newest first"""
+    try:
+        ObjectId(user_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid user ID")
+    try:
+        before_oid = ObjectId(before_id) if before_id else None
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    try:
+        history = await db.analysis_results.find_history(user_id, before=before, before_id=before_oid, limit=limit,
+                                                         projection=HISTORY_PROJECTIONS[view])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    # A full page means there may be older results
+    full_page = len(history) == limit
+
+    return MongoJSONResponse({
+        "items": ANALYSIS_HISTORY_VIEW.convert_many(history),
+        "next_before": history[-1]["date"].isoformat() if full_page else None,
+        "next_before_id": str(history[-1]["_id"]) if full_page else None
+    })
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call in the bounded analysis executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.analysis_executor, functools.partial(func, *args, **kwargs))
+
+def thread_safe_poster(outbox: asyncio.Queue):
+    """Return a callback that worker threads can use to queue messages for the socket"""
+    loop = asyncio.get_running_loop()
+    return lambda message: loop.call_soon_threadsafe(outbox.put_nowait, message)
+
+async def send_message(websocket: WebSocket, message):
+    """Send a queued message: dicts as JSON, bytes (preview JPEGs) as binary"""
+    if isinstance(message, bytes):
+        await websocket.send_bytes(message)
+    else:
+        await websocket.send_json(message)
+
+async def run_phase(websocket: WebSocket, system: DyslexiaAnalysisSystem, outbox: asyncio.Queue, func, **kwargs):
+    """
+    Run a blocking analysis phase in the executor while forwarding the
+    progress and preview messages it emits from its worker thread to the socket.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(app.state.analysis_executor, functools.partial(func, progress_callback=thread_safe_poster(outbox), **kwargs))
+    try:
+        while not future.done():
+            next_message = asyncio.ensure_future(outbox.get())
+            done, _ = await asyncio.wait({future, next_message}, return_when=asyncio.FIRST_COMPLETED)
+            if next_message in done:
+                await send_message(websocket, next_message.result())
+            else:
+                next_message.cancel()
+        while not outbox.empty():
+            await send_message(websocket, outbox.get_nowait())
+        return future.result()
+    except BaseException:
+        # Stop the worker before the session's devices are released
+        system.stop_event.set()
+        await asyncio.shield(asyncio.wait({future}))
+        raise
+
+async def ingest_client_media(websocket: WebSocket, system: DyslexiaAnalysisSystem, frame_format: ClientFrameFormat, outbox: asyncio.Queue):
+    """
+    Receive binary video frames and audio chunks from the client until cancelled.
+
+    Video frames are decoded into the session's frame buffer. At most
+    CLIENT_FRAME_QUEUE_SIZE frames wait for decoding; when the server falls
+    behind, the stalest waiting frame is dropped so latency stays bounded,
+    and the client is told how many frames have been dropped.
+
+    Audio chunks are never dropped: each one is fed straight into the
+    session's incremental audio analyzer, in arrival order. Frames or
+    chunks that cannot be decoded are skipped and reported as warnings.
+    """
+    loop = asyncio.get_running_loop()
+    pending = asyncio.Queue(maxsize=CLIENT_FRAME_QUEUE_SIZE)
+    dropped = 0
+    last_drop_report = 0.0
+    audio_errors = 0
+
+    async def decode_frames():
+        # Undecodable frames are counted and reported; they never end this task
+        failures = 0
+        last_failure_report = 0.0
+        while True:
+            data = await pending.get()
+            try:
+                frame = await loop.run_in_executor(app.state.decode_executor, decode_frame, data, frame_format)
+                error = None if frame is not None else "frame could not be decoded"
+            except Exception as e:
+                frame, error = None, str(e)
+            if frame is not None:
+                system.frame_buffer.put(frame)
+                continue
+            failures += 1
+            now = time.monotonic()
+            if now - last_failure_report >= 1:
+                last_failure_report = now
+                print(f"Client frame decode failed ({failures} so far): {error}")
+                outbox.put_nowait({"status": "warning", "message": f"Frame skipped: {error}", "decode_failures": failures})
+
+    decoder = asyncio.create_task(decode_frames())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                system.stop_event.set()
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            data = message.get("bytes")
+            if not data:
+                continue
+
+            kind, payload = data[0], memoryview(data)[1:]
+            if kind == CLIENT_AUDIO_CHUNK:
+                if system.audio_stream is not None:
+                    # A bad chunk is skipped and reported; it must not end the session's ingest
+                    try:
+                        system.audio_stream.feed(payload)
+                    except Exception as e:
+                        audio_errors += 1
+                        print(f"Error feeding audio chunk: {e}")
+                        outbox.put_nowait({"status": "warning", "message": f"Audio chunk skipped: {e}", "audio_errors": audio_errors})
+                continue
+            if kind != CLIENT_VIDEO_FRAME:
+                continue
+
+            if pending.full():
+                pending.get_nowait()
+                dropped += 1
+                now = time.monotonic()
+                if now - last_drop_report >= 1:
+                    last_drop_report = now
+                    outbox.put_nowait({"status": "backpressure", "dropped_frames": dropped})
+            pending.put_nowait(payload)
+    finally:
+        decoder.cancel()
+
+def parse_preview_fps(value):
+    """A client's requested preview rate, clamped to MIN_PREVIEW_FPS..MAX_PREVIEW_FPS"""
+    try:
+        fps = float(value)
+    except (TypeError, ValueError):
+        fps = math.nan
+    if isinstance(value, bool) or not math.isfinite(fps) or fps <= 0:
+        raise ValueError(f"preview_fps must be a positive number, got {value!r}")
+    return max(MIN_PREVIEW_FPS, min(fps, MAX_PREVIEW_FPS))
+
 # WebSocket route for real-time analysis
 @app.websocket("/ws/analyze")
-async def websocket_analyze(websocket: WebSocket):
+async def websocket_analyze(websocket: WebSocket, db: Database = Depends(get_db)):
     await websocket.accept()
+    session = None
+    ingest = None
     
     try:
         # Send initial connection message
@@ -529,46 +929,73 @@ async def websocket_analyze(websocket: WebSocket):
         if start_data.get("command") == "start":
             # Get user_id if provided
             user_id = start_data.get("user_id")
+            visualization_mode = start_data.get("visualization", "png")
             
-            # Send status update
-            await websocket.send_json({"status": "starting", "message": "Starting analysis process"})
+            # Lease this connection its own camera and microphone
+            # Frames come from the server's camera, or from the browser as binary messages
+            frame_source = start_data.get("source", "camera")
+            # Client sessions may also stream 16-bit mono PCM, analyzed as it arrives
+            audio_format = start_data.get("audio") if frame_source == "client" else None
+            try:
+                frame_format = ClientFrameFormat.from_message(start_data) if frame_source == "client" else None
+                if audio_format is True:
+                    audio_format = {}
+                sample_rate = int(audio_format.get("sample_rate", 16000)) if audio_format is not None else None
+                if sample_rate is not None and not 8000 <= sample_rate <= 48000:
+                    raise ValueError(f"Unsupported audio sample rate: {sample_rate}")
+                preview_fps = parse_preview_fps(start_data.get("preview_fps", 2)) if start_data.get("preview") else None
+                session = session_manager.open(frame_source=frame_source)
+            except (NoDeviceAvailable, ValueError) as e:
+                await websocket.send_json({"status": "error", "message": str(e)})
+                return
+            analysis_system = session.system
+            if sample_rate is not None:
+                analysis_system.audio_stream = IncrementalAudioAnalyzer(sample_rate=sample_rate)
+            outbox = asyncio.Queue()
             
-            # Initialize analysis process
-            analysis_system.initialize_camera()
+            # Optional annotated preview, sent as binary JPEG messages at a throttled rate
+            if preview_fps is not None:
+                analysis_system.preview = PreviewStream(thread_safe_poster(outbox), max_fps=preview_fps)
             
-            # Start audio recording
-            analysis_system.start_audio_recording()
-            await websocket.send_json({"status": "recording", "message": "Audio recording started"})
+            # Send status update
+            await websocket.send_json({"status": "starting", "message": "Starting analysis process", "session_id": session.session_id})
             
-            # Run facial expression analysis
-            await websocket.send_json({"status": "analyzing", "phase": "facial", "message": "Analyzing facial expressions"})
-            facial_data = analysis_system.analyze_facial_expressions(duration=10)
-            await websocket.send_json({"status": "complete", "phase": "facial", "data": facial_data})
+            if frame_source == "client":
+                # Decode the client's frames and audio into the session while the analyzers run
+                ingest = asyncio.create_task(ingest_client_media(websocket, analysis_system, frame_format, outbox))
+            else:
+                # Open the camera once and start the shared capture thread
+                await run_blocking(analysis_system.start_capture)
+                
+                # Start audio recording
+                analysis_system.start_audio_recording()
+                await websocket.send_json({"status": "recording", "message": "Audio recording started"})
             
-            # Run eye tracking analysis
-            await websocket.send_json({"status": "analyzing", "phase": "eyes", "message": "Analyzing eye movements"})
-            eye_data = analysis_system.analyze_eye_tracking(duration=10)
+            # Run facial expression and eye tracking analysis on the same frames
+            await websocket.send_json({"status": "analyzing", "phase": "reading", "message": "Analyzing facial expressions and eye movements"})
+            facial_data, eye_data = await run_phase(websocket, analysis_system, outbox, analysis_system.analyze_reading, duration=10)
+            if ingest is not None:
+                ingest.cancel()
+                with suppress(asyncio.CancelledError):
+                    await ingest
+            await websocket.send_json({"status": "complete", "phase": "facial", "data": facial_data})
             await websocket.send_json({"status": "complete", "phase": "eyes", "data": eye_data})
             
             # Stop audio recording and analyze
-            analysis_system.stop_audio_recording()
+            await run_blocking(analysis_system.stop_audio_recording)
             await websocket.send_json({"status": "analyzing", "phase": "audio", "message": "Analyzing audio data"})
-            audio_data = analysis_system.analyze_audio()
+            audio_data = await run_blocking(analysis_system.analyze_audio)
             await websocket.send_json({"status": "complete", "phase": "audio", "data": audio_data})
             
             # Clean up
-            analysis_system.release_camera()
+            await run_blocking(analysis_system.release_camera)
             
             # Generate final report
             await websocket.send_json({"status": "processing", "message": "Generating final report"})
             report = analysis_system.generate_dyslexia_analysis_report(facial_data, audio_data, eye_data)
             
-            # Create visualization
-            visualization_file = analysis_system.visualize_results(facial_data, audio_data, eye_data, report)
-            
-            # Add visualization URL if available
-            if visualization_file:
-                report["visualization_url"] = f"/visualizations/{os.path.basename(visualization_file)}"
+            # Attach the charts; PNGs are rendered in the background or when first fetched
+            add_visualization(report, facial_data, audio_data, eye_data, visualization_mode)
             
             # Save analysis result if user_id is provided
             if user_id:
@@ -578,17 +1005,15 @@ async def websocket_analyze(websocket: WebSocket):
                         "user_id": user_id,
                         "date": datetime.utcnow(),
                         "report": report,
+                        "metrics": extract_metrics(facial_data, audio_data, eye_data),
                         "type": "real-time"
                     }
                     
                     # Save to analysis_results collection
-                    result_id = analysis_results.insert_one(analysis_result).inserted_id
+                    result_id = await db.analysis_results.create(analysis_result)
                     
                     # Update user's analysis history
-                    users.update_one(
-                        {"_id": ObjectId(user_id)},
-                        {"$push": {"analysis_history": str(result_id)}}
-                    )
+                    await db.users.push_analysis_result(ObjectId(user_id), str(result_id))
                     
                     # Add result ID to the report
                     report["result_id"] = str(result_id)
@@ -603,12 +1028,200 @@ async def websocket_analyze(websocket: WebSocket):
     except Exception as e:
         await websocket.send_json({"status": "error", "message": str(e)})
     finally:
-        # Ensure resources are released
-        if hasattr(analysis_system, 'camera') and analysis_system.camera is not None:
-            analysis_system.release_camera()
-        
-        if hasattr(analysis_system, 'recording') and analysis_system.recording:
-            analysis_system.stop_audio_recording()
+        # Ensure this connection's resources (and only these) are released
+        if ingest is not None:
+            ingest.cancel()
+        if session is not None:
+            await run_blocking(session_manager.close, session)
+
+# =====================
+# Routes - Parent Questionnaire
+# =====================
+
+async def save_parent_assessment(db: Database, assessment: Dict[str, Any]):
+    """Persist an assessment after its response was sent; failures are logged, not raised"""
+    try:
+        await db.parent_assessments.create(assessment)
+    except Exception as e:
+        print(f"Error saving parent assessment: {e}")
+
+@app.post("/parents/analyze")
+async def analyze_parent_responses(
+    request: ParentAssessmentRequest,
+    background_tasks: BackgroundTasks,
+    db: Database = Depends(get_db)
+):
+    """
+    Score a parent questionnaire. Results for a response set already scored
+    with the current question bank are reused, and saving to the user's
+    history happens after the response is sent.
+    """
+    if request.user_id is not None:
+        try:
+            ObjectId(request.user_id)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid user ID")
+
+    try:
+        bank = get_question_bank()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=503, detail=f"Question bank unavailable: {e}")
+
+    cache_key = responses_cache_key(request.responses, bank)
+    result = parent_assessment_cache.get(cache_key)
+    if result is None:
+        result = analyze_dyslexia_responses(request.child_name, request.child_age, request.responses)
+        parent_assessment_cache.put(cache_key, {key: value for key, value in result.items() if key != "child_info"})
+    result["child_info"] = {"name": request.child_name, "age": request.child_age}
+
+    if request.user_id is not None:
+        # The id is assigned here so it can be returned before the insert has run
+        assessment_id = ObjectId()
+        result["assessment_id"] = str(assessment_id)
+        background_tasks.add_task(save_parent_assessment, db, {
+            "_id": assessment_id,
+            "user_id": request.user_id,
+            "child_name": request.child_name,
+            "child_age": request.child_age,
+            "responses": request.responses,
+            "overall_score": result["overall_score"],
+            "category_scores": result["category_scores"],
+            "severity_level": result["severity_level"],
+            "question_bank": bank.digest,
+            "rules_version": RULES_VERSION,
+            "created_at": datetime.utcnow()
+        })
+
+    return MongoJSONResponse(result)
+
+@app.get("/parents/analyze/cache")
+async def parent_assessment_cache_stats():
+    """Hit, miss and eviction counters of the parent questionnaire cache"""
+    return parent_assessment_cache.stats()
+
+@app.get("/parents/history/{user_id}", response_model=ParentHistoryPage)
+async def get_parent_history(
+    user_id: str,
+    before: Optional[datetime] = Query(None, description="Only return assessments older than this date (created_at of the last item on the previous page)"),
+    limit: int = Query(20, ge=1, le=MAX_HISTORY_PAGE_SIZE, description="Page size"),
+    db: Database = Depends(get_db)
+):
+    """Get one page of a user's parent questionnaire assessments, newest first"""
+    try:
+        ObjectId(user_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid user ID")
+
+    try:
+        history = await db.parent_assessments.find_by_user(user_id, before=before, limit=limit, projection=PARENT_HISTORY_VIEW.projection)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return MongoJSONResponse({
+        "items": PARENT_HISTORY_VIEW.convert_many(history),
+        "next_before": history[-1]["created_at"].isoformat() if len(history) == limit else None
+    })
+
+def score_parent_batch(content: bytes, is_csv: bool):
+    """Parse an uploaded batch and score every child in one pass"""
+    bank = get_question_bank()
+    if is_csv:
+        names, ages, values = read_responses_csv(content.decode("utf-8-sig"), bank)
+    else:
+        children = json.loads(content)
+        if isinstance(children, dict):
+            children = children.get("children")
+        if not isinstance(children, list):
+            raise ValueError("Expected a list of children or {\"children\": [...]}")
+        names, ages, values = read_responses_json(children, bank)
+    if len(names) > MAX_PARENT_BATCH_ROWS:
+        raise ValueError(f"At most {MAX_PARENT_BATCH_ROWS} children per batch")
+    return bank, names, ages, score_responses_batch(values, bank)
+
+async def read_parent_batch_body(request: Request):
+    """The upload's bytes and whether it is CSV; 413 once it exceeds MAX_PARENT_BATCH_BYTES"""
+    too_large = HTTPException(status_code=413, detail=f"Batch uploads are limited to {MAX_PARENT_BATCH_BYTES} bytes")
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_PARENT_BATCH_BYTES:
+        raise too_large
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form(max_files=1)
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Expected a file field")
+        content = await upload.read(MAX_PARENT_BATCH_BYTES + 1)
+        is_csv = (upload.filename or "").lower().endswith(".csv") or (upload.content_type or "").startswith("text/csv")
+    else:
+        # Chunked bodies carry no Content-Length, so the limit is also applied while reading
+        chunks, size = [], 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > MAX_PARENT_BATCH_BYTES:
+                raise too_large
+            chunks.append(chunk)
+        content = b"".join(chunks)
+        is_csv = content_type.startswith("text/csv")
+    if len(content) > MAX_PARENT_BATCH_BYTES:
+        raise too_large
+    return content, is_csv
+
+@app.post("/parents/analyze/batch")
+async def analyze_parent_batch(
+    request: Request,
+    recommendations: bool = Query(False, description="Include recommendations for each child (JSON only)")
+):
+    """
+    Score parent questionnaires for many children at once.
+
+    Accepts a JSON list of {child_name, child_age, responses} objects or CSV
+    with a child_name,child_age,<question id>... header, either as the
+    request body or as a multipart `file` upload. JSON uploads stream back
+    NDJSON, one result per child; CSV uploads stream back CSV. Responses
+    must be finite numbers from 0 to 100 and child details are checked as
+    for /parents/analyze (the age may be left out); uploads larger than
+    MAX_PARENT_BATCH_BYTES are refused with 413.
+    """
+    content, is_csv = await read_parent_batch_body(request)
+
+    try:
+        bank, names, ages, scored = await run_in_threadpool(score_parent_batch, content, is_csv)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    overall_scores = scored["overall_score"].tolist()
+    severity_levels = scored["severity_level"].tolist()
+    category_scores = scored["category_scores"].tolist()
+
+    def csv_rows():
+        yield ",".join(["child_name", "child_age", "overall_score", "severity_level", *bank.category_names]) + "\n"
+        for start in range(0, len(names), PARENT_BATCH_CHUNK_ROWS):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            for row in range(start, min(start + PARENT_BATCH_CHUNK_ROWS, len(names))):
+                writer.writerow([names[row], "" if ages[row] is None else ages[row], round(overall_scores[row], 2), severity_levels[row],
+                                 *(round(score, 2) for score in category_scores[row])])
+            yield buffer.getvalue()
+
+    def ndjson_rows():
+        for start in range(0, len(names), PARENT_BATCH_CHUNK_ROWS):
+            lines = []
+            for row in range(start, min(start + PARENT_BATCH_CHUNK_ROWS, len(names))):
+                result = {
+                    "overall_score": round(overall_scores[row], 2),
+                    "category_scores": {name: round(score, 2) for name, score in zip(bank.category_names, category_scores[row])},
+                    "severity_level": severity_levels[row],
+                    "child_info": {"name": names[row], "age": ages[row]}
+                }
+                if recommendations:
+                    result["recommendations"] = generate_recommendations(dict(zip(bank.categories, category_scores[row])))
+                lines.append(dumps(result))
+            yield b"\n".join(lines) + b"\n"
+
+    if is_csv:
+        return StreamingResponse(csv_rows(), media_type="text/csv")
+    return StreamingResponse(ndjson_rows(), media_type="application/x-ndjson")
 
 # =====================
 # Main Entry Point
@@ -0,0 +1,87 @@
+import hashlib
+import os
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+# Artifact keys are never reused, so a response for one can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Files that can be regenerated in place (feature sidecars) are revalidated every time
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Extensions of artifacts that are written once under a unique key
+IMMUTABLE_EXTENSIONS = (".png", ".wav")
+
+
+def is_immutable(key):
+    return key.endswith(IMMUTABLE_EXTENSIONS)
+
+
+def artifact_etag(key, stat_result):
+    """
+    Strong ETag for an artifact. Immutable artifacts are identified by
+    their key (and size, for older files); files regenerated in place also
+    by their modification time, so a rewrite changes the tag.
+    """
+    version = f"{key}:{stat_result.st_size}"
+    if not is_immutable(key):
+        version += f":{stat_result.st_mtime_ns}"
+    return '"' + hashlib.sha1(version.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def cache_control_for(key):
+    return IMMUTABLE_CACHE_CONTROL if is_immutable(key) else REVALIDATE_CACHE_CONTROL
+
+
+def etag_matches(request_headers, etag):
+    """Whether If-None-Match names etag (weak comparison, as RFC 9110 requires for If-None-Match)"""
+    if_none_match = request_headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(etag, cache_control):
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+class ArtifactFileResponse(FileResponse):
+    """
+    FileResponse for artifacts in the store.
+
+    Whole-file responses are handed to the server as a single
+    http.response.pathsend message when it offers that ASGI extension, so
+    it can use sendfile() and the file never passes through Python. Other
+    servers get the file in large chunks. HEAD, Range and If-Range requests
+    (seeking in a recording) are left to FileResponse, which answers ranges
+    with 206.
+    """
+
+    chunk_size = 256 * 1024
+
+    async def __call__(self, scope, receive, send):
+        pathsend = "http.response.pathsend" in scope.get("extensions", {})
+        if (not pathsend or self.stat_result is None or scope["method"].upper() == "HEAD"
+                or Headers(scope=scope).get("range") is not None):
+            await super().__call__(scope, receive, send)
+            return
+        # The headers, Content-Length included, were set from stat_result when the response was built
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+        if self.background is not None:
+            await self.background()
+
+    @classmethod
+    def for_request(cls, request, path, key, stat_result, etag=None, media_type=None):
+        """The response for a GET or HEAD of an artifact: 304 if the client's copy is current"""
+        etag = etag or artifact_etag(key, stat_result)
+        cache_control = cache_control_for(key)
+        if etag_matches(request.headers, etag):
+            return not_modified(etag, cache_control)
+        return cls(path, media_type=media_type, stat_result=stat_result,
+                   headers={"ETag": etag, "Cache-Control": cache_control})
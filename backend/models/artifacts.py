@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# Per-artifact metadata lives in this hidden subdirectory, one JSON file per artifact
+METADATA_DIRECTORY = ".meta"
+
+# Half-written temporary files older than this are left over from a crash
+STALE_TEMPORARY_SECONDS = 3600
+
+
+def store_options_from_env():
+    """Read artifact retention settings from the environment; 0 disables a limit"""
+    max_bytes = int(os.getenv("ARTIFACT_MAX_BYTES", 1024 ** 3))
+    max_age_days = float(os.getenv("ARTIFACT_MAX_AGE_DAYS", 30))
+    return {
+        "max_bytes": max_bytes or None,
+        "max_age": max_age_days * 86400 or None,
+    }
+
+
+class ArtifactStore:
+    """
+    Files produced by analyses (recordings, charts) with unique keys,
+    per-artifact metadata and size and age based retention.
+
+    Keys keep a readable prefix (reading_audio_, dyslexia_analysis_) and
+    end in either a timestamp plus random suffix or a content hash, so two
+    artifacts can never overwrite each other. Artifacts still being written
+    are reserved and never removed by the sweeper.
+    """
+
+    def __init__(self, directory, max_bytes=None, max_age=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._active = set()
+        self._stop_event = threading.Event()
+        self._sweeper = None
+        os.makedirs(os.path.join(directory, METADATA_DIRECTORY), exist_ok=True)
+
+    def new_key(self, prefix, extension):
+        """A key that is unique even for artifacts created in the same second"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"{prefix}_{timestamp}_{uuid.uuid4().hex[:8]}{extension}"
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key)
+
+    def _metadata_path(self, key):
+        return os.path.join(self.directory, METADATA_DIRECTORY, f"{key}.json")
+
+    def exists(self, key):
+        return os.path.isfile(self.path_for(key))
+
+    def is_finished(self, key):
+        """
+        Whether key names a finished artifact in the store: not a path, a
+        hidden or temporary file, or an artifact that is still being written
+        """
+        if key != os.path.basename(key) or key.startswith(".") or key.endswith(".tmp"):
+            return False
+        with self._lock:
+            if key in self._active:
+                return False
+        return self.exists(key)
+
+    def reserve(self, prefix, extension):
+        """Claim a new key for an artifact written incrementally; returns (key, path)"""
+        key = self.new_key(prefix, extension)
+        with self._lock:
+            self._active.add(key)
+        return key, self.path_for(key)
+
+    def commit(self, key, content_type, **metadata):
+        """Record metadata for a finished reserved artifact and make it subject to retention"""
+        self._write_metadata(key, content_type, metadata)
+        with self._lock:
+            self._active.discard(key)
+
+    def abandon(self, key):
+        """Give up a reserved artifact that could not be finished"""
+        self.delete(key)
+        with self._lock:
+            self._active.discard(key)
+
+    def put_bytes(self, key, data, content_type, **metadata):
+        """Write a complete artifact atomically and return its path"""
+        path = self.path_for(key)
+        # Write under a temporary name so readers never see a partial file
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+        self._write_metadata(key, content_type, metadata)
+        return path
+
+    def _write_metadata(self, key, content_type, metadata):
+        record = {
+            "key": key,
+            "content_type": content_type,
+            "size": os.path.getsize(self.path_for(key)),
+            "created_at": time.time(),
+            **metadata
+        }
+        with open(self._metadata_path(key), "w") as f:
+            json.dump(record, f)
+
+    def metadata(self, key):
+        try:
+            with open(self._metadata_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def delete(self, key):
+        for path in (self.path_for(key), self._metadata_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def sweep(self):
+        """
+        Apply retention: remove artifacts older than max_age, then the oldest
+        ones until the total size is within max_bytes. Returns the number of
+        artifacts removed.
+        """
+        now = time.time()
+        with self._lock:
+            active = set(self._active)
+
+        artifacts = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+                stat = entry.stat()
+                if entry.name.endswith(".tmp"):
+                    if now - stat.st_mtime > STALE_TEMPORARY_SECONDS:
+                        os.remove(entry.path)
+                    continue
+                if entry.name in active:
+                    continue
+                # Artifacts are never modified once written, so mtime is their age (also for
+                # files from before the store existed, which have no metadata)
+                artifacts.append((stat.st_mtime, stat.st_size, entry.name))
+
+        removed = 0
+        artifacts.sort()
+        if self.max_age is not None:
+            expired = [artifact for artifact in artifacts if now - artifact[0] > self.max_age]
+            for _, _, key in expired:
+                self.delete(key)
+            removed += len(expired)
+            artifacts = artifacts[len(expired):]
+
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in artifacts)
+            for _, size, key in artifacts:
+                if total <= self.max_bytes:
+                    break
+                self.delete(key)
+                total -= size
+                removed += 1
+
+        # Metadata of artifacts removed by other means
+        metadata_directory = os.path.join(self.directory, METADATA_DIRECTORY)
+        for name in os.listdir(metadata_directory):
+            if name.endswith(".json") and not os.path.exists(self.path_for(name[:-5])):
+                os.remove(os.path.join(metadata_directory, name))
+
+        if removed:
+            print(f"Artifact retention removed {removed} file(s) from {self.directory}")
+        return removed
+
+    def start_sweeper(self, interval=600):
+        """Run sweep() every interval seconds in a background thread"""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop_event.clear()
+        self._sweeper = threading.Thread(target=self._run_sweeper, args=(interval,), name="artifact-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop_event.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _run_sweeper(self, interval):
+        while not self._stop_event.is_set():
+            try:
+                self.sweep()
+            except OSError as e:
+                print(f"Artifact sweep error: {e}")
+            self._stop_event.wait(interval)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_artifact_store(directory="dyslexia_analysis_results"):
+    """The process-wide store for a directory, configured from the environment on first use"""
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = _stores[directory] = ArtifactStore(directory, **store_options_from_env())
+        return store
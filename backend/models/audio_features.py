@@ -0,0 +1,295 @@
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from models.audio_io import read_wav_samples
+
+# Analysis frame length for all energy based audio features
+FRAME_SECONDS = 0.02
+
+# A frame is voiced when it is this far above the tracked noise floor...
+VOICE_MARGIN_DB = 12.0
+# ...and above this absolute level (full scale = 0 dB)
+MIN_VOICE_DB = -50.0
+
+# Silences between voiced segments at least this long count as hesitations
+HESITATION_PAUSE_SECONDS = 0.5
+
+# Isolated voiced bursts shorter than this are counted as broken-off
+# articulations (false starts, repeated sounds); the signal-level proxy for
+# pronunciation errors
+FRAGMENT_MAX_SECONDS = 0.1
+
+# Energy must rise and fall by this much for a peak to count as a syllable nucleus
+SYLLABLE_PROMINENCE_DB = 3.0
+
+# Average syllables per word in early reader texts
+SYLLABLES_PER_WORD = 1.4
+
+# Frames on each side of a peak searched for the valleys that define its prominence
+SYLLABLE_VALLEY_FRAMES = 5
+
+# Percentile of frame energies taken as the noise floor of a whole recording
+NOISE_FLOOR_PERCENTILE = 10
+
+# Pause length histogram bin edges in seconds
+PAUSE_HISTOGRAM_EDGES = (0.0, 0.25, 0.5, 1.0, 2.0, np.inf)
+
+# How quickly the noise floor is allowed to rise per frame when no quieter frame arrives
+NOISE_FLOOR_RISE_DB = 0.05
+
+
+def pcm16_to_float(data):
+    """View little-endian 16-bit PCM bytes as float32 samples in [-1, 1]"""
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def frame_energy_db(samples, frame_length):
+    """RMS energy in dB of consecutive non-overlapping frames (a trailing partial frame is ignored)"""
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20.0 * np.log10(rms + 1e-10)
+
+
+class IncrementalAudioAnalyzer:
+    """
+    Audio features updated chunk by chunk while a reading is streamed in.
+
+    Every complete 20 ms frame updates the voice activity state, pause and
+    hesitation counts, syllable nuclei and energy statistics as it arrives,
+    so the final metrics are available as soon as the last chunk is fed.
+    """
+
+    def __init__(self, sample_rate=16000):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * FRAME_SECONDS)
+        self._remainder = np.empty(0, dtype=np.float32)
+        # Chunks may split a sample; its first byte waits for the next chunk
+        self._odd_byte = b""
+
+        self.total_frames = 0
+        self.voiced_frames = 0
+        self.voiced_energy_sum = 0.0
+        self.hesitations = 0
+        self.fragments = 0
+        self.syllables = 0
+        self.syllable_frames = []
+
+        self._noise_floor = None
+        self._in_voice = False
+        self._seen_voice = False
+        self._segment_frames = 0
+        self._pause_frames = 0
+        self._armed = False
+        self._peak = 0.0
+        self._valley = 0.0
+
+    def feed(self, data):
+        """Consume one chunk of 16-bit mono PCM bytes; chunks need not hold whole samples"""
+        data = self._odd_byte + bytes(data)
+        whole = len(data) & ~1
+        self._odd_byte = data[whole:]
+        samples = pcm16_to_float(memoryview(data)[:whole])
+        if len(self._remainder):
+            samples = np.concatenate((self._remainder, samples))
+
+        energies = frame_energy_db(samples, self.frame_length)
+        self._remainder = samples[len(energies) * self.frame_length:]
+        for energy in energies.tolist():
+            self._update(energy)
+
+    def _update(self, energy):
+        # Track the noise floor: drop to any quieter frame, rise slowly otherwise
+        if self._noise_floor is None or energy < self._noise_floor:
+            self._noise_floor = energy
+        else:
+            self._noise_floor += NOISE_FLOOR_RISE_DB
+
+        voiced = energy > MIN_VOICE_DB and energy > self._noise_floor + VOICE_MARGIN_DB
+        frame_index = self.total_frames
+        self.total_frames += 1
+
+        if voiced:
+            if not self._in_voice:
+                # Onset of a new voiced segment, after a pause if we have heard speech before
+                if self._seen_voice and self._pause_frames * FRAME_SECONDS >= HESITATION_PAUSE_SECONDS:
+                    self.hesitations += 1
+                self._in_voice = True
+                self._seen_voice = True
+                self._segment_frames = 0
+                self._armed = False
+                self._valley = self._noise_floor
+            self._segment_frames += 1
+            self._pause_frames = 0
+            self.voiced_frames += 1
+            self.voiced_energy_sum += energy
+
+            # Syllable nuclei: prominent energy peaks inside voiced speech
+            if self._armed:
+                if energy > self._peak:
+                    self._peak = energy
+                elif energy < self._peak - SYLLABLE_PROMINENCE_DB:
+                    self._armed = False
+                    self._valley = energy
+            else:
+                if energy < self._valley:
+                    self._valley = energy
+                elif energy > self._valley + SYLLABLE_PROMINENCE_DB:
+                    self._armed = True
+                    self._peak = energy
+                    self.syllables += 1
+                    self.syllable_frames.append(frame_index)
+        else:
+            if self._in_voice and self._segment_frames * FRAME_SECONDS < FRAGMENT_MAX_SECONDS:
+                self.fragments += 1
+            self._in_voice = False
+            self._pause_frames += 1
+
+    def features(self):
+        """Snapshot of the features accumulated so far"""
+        return audio_features(
+            duration=self.total_frames * FRAME_SECONDS,
+            voiced_seconds=self.voiced_frames * FRAME_SECONDS,
+            syllable_times=np.asarray(self.syllable_frames, dtype=np.float32) * FRAME_SECONDS,
+            hesitations=self.hesitations,
+            fragments=self.fragments,
+            mean_voiced_energy_db=self.voiced_energy_sum / self.voiced_frames if self.voiced_frames else MIN_VOICE_DB
+        )
+
+
+def audio_features(duration, voiced_seconds, syllable_times, hesitations, fragments, mean_voiced_energy_db):
+    """Derive reading speed and rhythm from the raw segment statistics"""
+    syllables = len(syllable_times)
+    words = syllables / SYLLABLES_PER_WORD
+    reading_speed = words / duration * 60 if duration > 0 else 0.0
+
+    # Steady reading has evenly spaced syllables; rhythm falls with interval variability
+    intervals = np.diff(syllable_times)
+    if len(intervals) >= 2 and intervals.mean() > 0:
+        variability = float(intervals.std() / intervals.mean())
+        reading_rhythm_score = max(0.0, min(100.0, 100.0 * (1.0 - variability / 2.0)))
+    else:
+        reading_rhythm_score = 0.0
+
+    return {
+        "duration": duration,
+        "voiced_seconds": voiced_seconds,
+        "syllables": syllables,
+        "speech_rate_syllables_per_second": syllables / voiced_seconds if voiced_seconds > 0 else 0.0,
+        "reading_speed": reading_speed,
+        "hesitations": hesitations,
+        "pronunciation_errors": fragments,
+        "reading_rhythm_score": reading_rhythm_score,
+        "mean_voiced_energy_db": mean_voiced_energy_db,
+    }
+
+
+def _segments(mask):
+    """Start (inclusive) and end (exclusive) indexes of the runs of True in a boolean array"""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _syllable_frames(energy, voiced):
+    """Indexes of voiced local energy maxima that stand out from the valleys on both sides"""
+    k = SYLLABLE_VALLEY_FRAMES
+    if len(energy) < 3:
+        return np.empty(0, dtype=np.intp)
+    padded = np.pad(energy, k, mode="edge")
+    windows = sliding_window_view(padded, 2 * k + 1)
+    left_valley = windows[:, :k].min(axis=1)
+    right_valley = windows[:, k + 1:].min(axis=1)
+    # A plateau counts once, at its first frame
+    is_peak = (energy >= windows[:, k + 1]) & (energy > windows[:, k - 1])
+    prominent = energy - np.maximum(left_valley, right_valley) >= SYLLABLE_PROMINENCE_DB
+    return np.flatnonzero(is_peak & prominent & voiced)
+
+
+def analyze_samples(samples, rate):
+    """
+    Audio features of a whole recording, computed with array operations only.
+
+    samples may be int16 PCM (mono or frames x channels, e.g. a memory-mapped
+    WAV) or floats in [-1, 1].
+    """
+    # Integer PCM is scaled to [-1, 1] before anything else, so channel averaging works on floats
+    scale = 1.0 / 32768.0 if samples.dtype.kind in "iu" else 1.0
+    frame_length = int(rate * FRAME_SECONDS)
+    frame_count = len(samples) // frame_length
+    frames = np.asarray(samples[:frame_count * frame_length], dtype=np.float32)
+    if scale != 1.0:
+        frames *= scale
+    if frames.ndim > 1:
+        frames = frames.mean(axis=1)
+    frames = frames.reshape(frame_count, frame_length)
+
+    mean_square = np.einsum("ij,ij->i", frames, frames) / frame_length
+    energy = 10.0 * np.log10(mean_square + 1e-20)
+
+    if frame_count:
+        noise_floor = np.percentile(energy, NOISE_FLOOR_PERCENTILE)
+    else:
+        noise_floor = MIN_VOICE_DB
+    voiced = energy > max(MIN_VOICE_DB, noise_floor + VOICE_MARGIN_DB)
+
+    starts, ends = _segments(voiced)
+    pauses = (starts[1:] - ends[:-1]) * FRAME_SECONDS
+    segment_lengths = (ends - starts) * FRAME_SECONDS
+    syllable_times = _syllable_frames(energy, voiced) * FRAME_SECONDS
+    voiced_frames = int(np.count_nonzero(voiced))
+
+    features = audio_features(
+        duration=frame_count * FRAME_SECONDS,
+        voiced_seconds=voiced_frames * FRAME_SECONDS,
+        syllable_times=syllable_times,
+        hesitations=int(np.count_nonzero(pauses >= HESITATION_PAUSE_SECONDS)),
+        fragments=int(np.count_nonzero(segment_lengths < FRAGMENT_MAX_SECONDS)),
+        mean_voiced_energy_db=float(energy[voiced].mean()) if voiced_frames else MIN_VOICE_DB
+    )
+    features["voiced_segments"] = len(starts)
+    features["pause_histogram"] = {
+        "edges": [float(edge) for edge in PAUSE_HISTOGRAM_EDGES[:-1]],
+        "counts": np.histogram(pauses, bins=PAUSE_HISTOGRAM_EDGES)[0].tolist()
+    }
+    features["mean_pause_seconds"] = float(pauses.mean()) if len(pauses) else 0.0
+    return features
+
+
+def analyze_wav(filename):
+    """Audio features of a saved 16-bit PCM recording, read through a memory map"""
+    samples, rate = read_wav_samples(filename)
+    return analyze_samples(samples, rate)
+
+
+def backfill(directory, force=False):
+    """Write a .features.json file next to every reading recording that lacks one"""
+    written = 0
+    for filename in sorted(glob.glob(os.path.join(directory, "reading_audio_*.wav"))):
+        target = os.path.splitext(filename)[0] + ".features.json"
+        if os.path.exists(target) and not force:
+            continue
+        try:
+            features = analyze_wav(filename)
+        except ValueError as e:
+            print(f"Skipping {filename}: {e}")
+            continue
+        with open(target, "w") as f:
+            json.dump(features, f)
+        written += 1
+    print(f"Wrote features for {written} recording(s)")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute audio features for saved reading recordings")
+    parser.add_argument("directory", nargs="?", default="dyslexia_analysis_results")
+    parser.add_argument("--force", action="store_true", help="recompute recordings that already have features")
+    args = parser.parse_args()
+    backfill(args.directory, force=args.force)
@@ -0,0 +1,95 @@
+import collections
+import struct
+import wave
+
+import numpy as np
+
+
+class WavChunkWriter:
+    """
+    Writes audio chunks straight into a WAV file as they are recorded.
+
+    Only the most recent `tail_chunks` chunks stay in memory (for level
+    meters and the like); everything else lives on disk, so memory use does
+    not grow with the length of the recording.
+    """
+
+    def __init__(self, filename, rate, channels=1, sample_width=2, tail_chunks=32):
+        self.filename = filename
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.frame_count = 0
+        self._tail = collections.deque(maxlen=tail_chunks)
+        self._wf = wave.open(filename, "wb")
+        self._wf.setnchannels(channels)
+        self._wf.setsampwidth(sample_width)
+        self._wf.setframerate(rate)
+
+    def write(self, data):
+        # writeframesraw skips the per-chunk header rewrite; close() patches the sizes once
+        self._wf.writeframesraw(data)
+        self.frame_count += len(data) // (self.sample_width * self.channels)
+        self._tail.append(data)
+
+    def tail(self):
+        """The most recently written audio as one bytes object"""
+        return b"".join(self._tail)
+
+    @property
+    def duration(self):
+        return self.frame_count / self.rate
+
+    def close(self):
+        if self._wf is not None:
+            self._wf.close()
+            self._wf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _find_chunks(mm):
+    """Yield (chunk_id, data_offset, size) for every chunk of a RIFF/WAVE file"""
+    if len(mm) < 12 or bytes(mm[0:4]) != b"RIFF" or bytes(mm[8:12]) != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+    offset = 12
+    while offset + 8 <= len(mm):
+        chunk_id = bytes(mm[offset:offset + 4])
+        size = struct.unpack("<I", bytes(mm[offset + 4:offset + 8]))[0]
+        yield chunk_id, offset + 8, size
+        # Chunks are padded to an even number of bytes
+        offset += 8 + size + (size & 1)
+
+
+def read_wav_samples(filename):
+    """
+    Memory-map the samples of a 16-bit PCM WAV file.
+
+    Returns (samples, rate) where samples is a read-only int16 array of shape
+    (frames,) for mono or (frames, channels) otherwise. Nothing is read into
+    memory until the samples are actually used.
+    """
+    mm = np.memmap(filename, dtype=np.uint8, mode="r")
+    fmt = None
+    for chunk_id, offset, size in _find_chunks(mm):
+        if chunk_id == b"fmt ":
+            audio_format, channels, rate, _, _, bits = struct.unpack("<HHIIHH", bytes(mm[offset:offset + 16]))
+            fmt = (audio_format, channels, rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            audio_format, channels, rate, bits = fmt
+            if audio_format != 1 or bits != 16:
+                raise ValueError("Only 16-bit PCM WAV files are supported")
+            # A recording cut short may declare more data than the file holds
+            size = min(size, len(mm) - offset)
+            frames = size // (2 * channels)
+            samples = np.frombuffer(mm, dtype="<i2", count=frames * channels, offset=offset)
+            if channels > 1:
+                samples = samples.reshape(frames, channels)
+            return samples, rate
+    raise ValueError("WAV file has no data chunk")
@@ -0,0 +1,168 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameRingBuffer:
+    """
+    Fixed-size ring of the most recent camera frames.
+
+    Every frame gets an increasing sequence number, so any number of
+    consumers can read the same frames independently. A consumer that falls
+    more than `capacity` frames behind skips ahead to the oldest frame still
+    held instead of blocking the producer.
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self._frames = [None] * capacity
+        self._timestamps = [0.0] * capacity
+        self._next_seq = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def put(self, frame, timestamp=None):
+        """Store a frame, overwriting the oldest one once the ring is full"""
+        with self._condition:
+            slot = self._next_seq % self.capacity
+            self._frames[slot] = frame
+            self._timestamps[slot] = timestamp if timestamp is not None else time.time()
+            self._next_seq += 1
+            self._condition.notify_all()
+
+    def get_after(self, last_seq, timeout=1.0):
+        """
+        Return (seq, timestamp, frame) for the first frame newer than last_seq.
+
+        Returns None if no frame arrives within timeout or the buffer is closed.
+        """
+        with self._condition:
+            wanted = max(last_seq + 1, self._next_seq - self.capacity)
+            if not self._condition.wait_for(lambda: self._next_seq > wanted or self._closed, timeout):
+                return None
+            if self._next_seq <= wanted:
+                return None
+            slot = wanted % self.capacity
+            return wanted, self._timestamps[slot], self._frames[slot]
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def latest_seq(self):
+        """Sequence number of the newest frame, or -1 if none has arrived yet"""
+        with self._condition:
+            return self._next_seq - 1
+
+    def close(self):
+        """Wake up every waiting consumer; no more frames will arrive"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def reopen(self):
+        with self._condition:
+            self._closed = False
+
+
+class CaptureThread:
+    """Single reader of an open camera that feeds a FrameRingBuffer"""
+
+    def __init__(self, camera, buffer):
+        self.camera = camera
+        self.buffer = buffer
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self.buffer.reopen()
+        self._thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.buffer.close()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            if self.camera is None or not self.camera.isOpened():
+                print("Camera disconnected during capture.")
+                break
+
+            ret, frame = self.camera.read()
+            if not ret:
+                print("Failed to capture frame.")
+                time.sleep(0.01)
+                continue
+
+            self.buffer.put(frame)
+        self.buffer.close()
+
+
+# Raw pixel layouts a browser client may send, with their channel counts
+RAW_PIXEL_CHANNELS = {"bgr": 3, "rgb": 3, "rgba": 4}
+RAW_TO_BGR = {"rgb": cv2.COLOR_RGB2BGR, "rgba": cv2.COLOR_RGBA2BGR}
+
+# Largest width or height accepted for client frames
+MAX_CLIENT_FRAME_DIMENSION = 4096
+
+
+class ClientFrameFormat:
+    """How a client encodes the binary frame messages it streams to the server"""
+
+    def __init__(self, kind="jpeg", width=None, height=None):
+        if not isinstance(kind, str) or (kind != "jpeg" and kind not in RAW_PIXEL_CHANNELS):
+            raise ValueError(f"Unsupported frame format: {kind}")
+        if kind != "jpeg" and (width is None or height is None):
+            raise ValueError("Raw frames need width and height")
+        for name, value in (("width", width), ("height", height)):
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= MAX_CLIENT_FRAME_DIMENSION:
+                raise ValueError(f"Frame {name} must be an integer from 1 to {MAX_CLIENT_FRAME_DIMENSION}")
+        self.kind = kind
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def from_message(cls, message):
+        """Build the format from the client's start message"""
+        return cls(
+            kind=message.get("frame_format", "jpeg"),
+            width=message.get("width"),
+            height=message.get("height")
+        )
+
+
+def decode_frame(data, frame_format):
+    """
+    Turn one binary client message into a BGR frame.
+
+    The payload is wrapped with np.frombuffer instead of being copied. Raw
+    BGR frames are returned as a read-only view of the message itself; JPEG
+    and RGB(A) frames are decoded or converted straight from that view.
+    Returns None for payloads that cannot be decoded.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if frame_format.kind == "jpeg":
+        return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+    channels = RAW_PIXEL_CHANNELS[frame_format.kind]
+    if buffer.size != frame_format.width * frame_format.height * channels:
+        return None
+    image = buffer.reshape(frame_format.height, frame_format.width, channels)
+    if frame_format.kind == "bgr":
+        return image
+    return cv2.cvtColor(image, RAW_TO_BGR[frame_format.kind])
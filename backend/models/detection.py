@@ -0,0 +1,130 @@
+import threading
+
+import cv2
+import numpy as np
+
+FACE_CASCADE = "haarcascade_frontalface_default.xml"
+EYE_CASCADE = "haarcascade_eye.xml"
+
+# Faces are detected on frames downscaled to this width
+DETECTION_WIDTH = 320
+
+# Eyes are only searched for in this top fraction of each face box
+UPPER_FACE_FRACTION = 0.6
+
+# Larger faces are downscaled to this width before the eye search; eyes are
+# then still about 20 px wide, the size of the eye cascade's window
+EYE_SEARCH_FACE_WIDTH = 96
+
+# CascadeClassifier is not safe to share between threads, so each worker
+# thread loads its own copy once and reuses it for every later session
+_thread_local = threading.local()
+
+
+def get_cascade(name):
+    """Return the named Haar cascade, loaded from disk at most once per thread"""
+    cascades = getattr(_thread_local, "cascades", None)
+    if cascades is None:
+        cascades = _thread_local.cascades = {}
+
+    if name not in cascades:
+        classifier = cv2.CascadeClassifier(cv2.data.haarcascades + name)
+        if classifier.empty():
+            raise RuntimeError(f"Could not load cascade {name}")
+        cascades[name] = classifier
+    return cascades[name]
+
+
+class AdaptiveMinSize:
+    """
+    minSize for detectMultiScale that calibrates itself from the first detections.
+
+    Until enough detections are seen a permissive default is used; after that
+    the minimum is set just below the smallest typical detection so the
+    cascade skips the many small scales that never match.
+    """
+
+    def __init__(self, default, calibration_samples=5, ratio=0.7, floor=8):
+        self.value = (default, default)
+        self.calibration_samples = calibration_samples
+        self.ratio = ratio
+        self.floor = floor
+        self._widths = []
+
+    @property
+    def calibrated(self):
+        return len(self._widths) >= self.calibration_samples
+
+    def observe(self, detections):
+        if self.calibrated or len(detections) == 0:
+            return
+        self._widths.extend(int(w) for (_, _, w, _) in detections)
+        if self.calibrated:
+            size = max(self.floor, int(np.median(self._widths) * self.ratio))
+            self.value = (size, size)
+
+
+class FaceEyeDetector:
+    """
+    Face and eye detection tuned for the per-frame hot loop.
+
+    Faces are found on a downscaled copy of the frame, and eyes only inside
+    the upper part of each detected face, downscaled to a fixed face width,
+    instead of across the whole image. All returned boxes are in
+    full-resolution frame coordinates.
+    """
+
+    def __init__(self, detection_width=DETECTION_WIDTH, eye_search_face_width=EYE_SEARCH_FACE_WIDTH):
+        self.face_cascade = get_cascade(FACE_CASCADE)
+        self.eye_cascade = get_cascade(EYE_CASCADE)
+        self.detection_width = detection_width
+        self.eye_search_face_width = eye_search_face_width
+        self.face_min_size = AdaptiveMinSize(default=24)
+        self.eye_min_size = AdaptiveMinSize(default=12)
+
+    def detect_faces(self, gray):
+        height, width = gray.shape[:2]
+        scale = min(1.0, self.detection_width / width)
+        small = gray if scale == 1.0 else cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+        faces = self.face_cascade.detectMultiScale(small, 1.3, 5, minSize=self.face_min_size.value)
+        self.face_min_size.observe(faces)
+        if len(faces) == 0:
+            return []
+        return [tuple(int(v / scale) for v in face) for face in faces]
+
+    def detect_eyes(self, gray, faces=None):
+        if faces is None:
+            faces = self.detect_faces(gray)
+
+        eyes = []
+        for (x, y, w, h) in faces:
+            roi = gray[y:y + int(h * UPPER_FACE_FRACTION), x:x + w]
+            if roi.size == 0:
+                continue
+            scale = min(1.0, self.eye_search_face_width / w)
+            if scale < 1.0:
+                roi_height, roi_width = roi.shape[:2]
+                roi = cv2.resize(roi, (max(1, int(roi_width * scale)), max(1, int(roi_height * scale))), interpolation=cv2.INTER_AREA)
+            found = self.eye_cascade.detectMultiScale(roi, 1.3, 5, minSize=self.eye_min_size.value)
+            self.eye_min_size.observe(found)
+            eyes.extend((x + int(ex / scale), y + int(ey / scale), int(ew / scale), int(eh / scale)) for (ex, ey, ew, eh) in found)
+        return eyes
+
+
+def label_eyes(eyes, faces):
+    """
+    Pair each eye box with a stable id: 0 if its centre is in the left half
+    of the face it was found in, 1 if in the right half. Ids then stay with
+    the same eye when the other one is not detected in a frame.
+    """
+    labeled = []
+    for (ex, ey, ew, eh) in eyes:
+        centre_x, centre_y = ex + ew / 2, ey + eh / 2
+        eye_id = 0
+        for (x, y, w, h) in faces:
+            if x <= centre_x < x + w and y <= centre_y < y + h:
+                eye_id = 0 if centre_x < x + w / 2 else 1
+                break
+        labeled.append((eye_id, (ex, ey, ew, eh)))
+    return labeled
@@ -1,18 +1,64 @@
 import cv2
 import time
 import random
-import numpy as np
 import threading
 import pyaudio
-import wave
 import os
-import matplotlib.pyplot as plt
-from datetime import datetime
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from models.artifacts import get_artifact_store
+from models.audio_features import analyze_wav
+from models.audio_io import WavChunkWriter
+from models.capture import CaptureThread, FrameRingBuffer
+from models.detection import FaceEyeDetector, label_eyes
+from models.gaze import GazeBuffer, classify_gaze
+from models.preview import annotate_frame
+from models.rules import RISK
+from models.scoring import INDICATOR_MAX_SCORES, REPORT_THRESHOLDS, extract_metrics
+from models.visualization import render_report_png
+
+# Number of recent frames kept for the analyzers (about 2 seconds at 30 fps)
+FRAME_BUFFER_SIZE = 64
+
+# Long-lived threads running the eye tracking half of analyze_reading, one per
+# concurrent analysis; each keeps its Haar cascades loaded between sessions
+_eye_workers = ThreadPoolExecutor(max_workers=int(os.getenv("ANALYSIS_MAX_WORKERS", 4)), thread_name_prefix="eye-analysis")
+
+def _progress_message(phase, message, elapsed, duration, **counters):
+    """Build a progress update in the shape the frontend expects"""
+    return {
+        "status": "progress",
+        "stage": phase,
+        "phase": phase,
+        "message": f"{message} ({max(0, duration - elapsed)}s remaining)",
+        "percent": min(100, int(elapsed / max(1, duration) * 100)),
+        "elapsed": elapsed,
+        "duration": duration,
+        **counters
+    }
 
 class DyslexiaAnalysisSystem:
-    def __init__(self):
+    def __init__(self, camera_index=None, microphone_index=None, headless=False, frame_source="camera"):
+        # Devices leased to this instance; None means probe/use the defaults
+        self.camera_index = camera_index
+        self.microphone_index = microphone_index
+        # "camera" reads a local device; "client" frames are pushed into frame_buffer by the caller
+        self.frame_source = frame_source
+        # Headless instances (the API server) never draw or open windows
+        self.headless = headless
+        # Optional PreviewStream receiving throttled annotated frames
+        self.preview = None
         self.camera = None
+        # One capture thread feeds every analyzer through this ring buffer
+        self.frame_buffer = FrameRingBuffer(capacity=FRAME_BUFFER_SIZE)
+        self.capture_thread = None
         self.recording = False
+        self.audio_thread = None
+        # IncrementalAudioAnalyzer fed with PCM chunks streamed by a client, if any
+        self.audio_stream = None
+        # Set to abort a running analysis phase early (e.g. client disconnected)
+        self.stop_event = threading.Event()
         self.audio_data = []
         self.eye_positions = []
         self.facial_expressions = []
@@ -21,14 +67,24 @@ class DyslexiaAnalysisSystem:
         # Create results directory if it doesn't exist
         if not os.path.exists(self.results_directory):
             os.makedirs(self.results_directory)
+        # Recordings and charts are stored under unique keys with retention applied
+        self.artifacts = get_artifact_store(self.results_directory)
     
     def initialize_camera(self):
         """Initialize the camera with error handling"""
+        # Keep an already open camera warm instead of probing devices again
+        if self.camera is not None and self.camera.isOpened():
+            return True
+        
         try:
-            self.camera = cv2.VideoCapture(0)  # Try to open default camera (index 0)
-            if not self.camera.isOpened():
-                print("Error: Could not open camera with index 0. Trying index 1...")
-                self.camera = cv2.VideoCapture(1)  # Try alternative camera
+            if self.camera_index is not None:
+                # Only ever open the camera this instance was assigned
+                self.camera = cv2.VideoCapture(self.camera_index)
+            else:
+                self.camera = cv2.VideoCapture(0)  # Try to open default camera (index 0)
+                if not self.camera.isOpened():
+                    print("Error: Could not open camera with index 0. Trying index 1...")
+                    self.camera = cv2.VideoCapture(1)  # Try alternative camera
                 
             if not self.camera.isOpened():
                 print("Error: Could not open any camera. Please check your camera connection.")
@@ -48,10 +104,107 @@ class DyslexiaAnalysisSystem:
     
     def release_camera(self):
         """Safely release the camera"""
+        self.stop_capture()
         if self.camera is not None and self.camera.isOpened():
             self.camera.release()
             print("Camera released.")
     
+    def start_capture(self):
+        """Open the camera if needed and start the shared capture thread"""
+        if self.frame_source == "client":
+            # Frames arrive from the client; there is no device to open
+            return not self.frame_buffer.closed
+        if not self.initialize_camera():
+            return False
+        if self.capture_thread is None or self.capture_thread.camera is not self.camera:
+            self.capture_thread = CaptureThread(self.camera, self.frame_buffer)
+        self.capture_thread.start()
+        return True
+    
+    def stop_capture(self):
+        """Stop the capture thread; the camera handle stays open"""
+        if self.capture_thread is not None:
+            self.capture_thread.stop()
+    
+    def _iter_frames(self, duration):
+        """Yield (timestamp, frame) from the shared capture buffer for duration seconds"""
+        last_seq = self.frame_buffer.latest_seq()
+        end_time = time.time() + duration
+        
+        while not self.stop_event.is_set():
+            item = self.frame_buffer.get_after(last_seq, timeout=0.5)
+            if item is None:
+                if self.frame_buffer.closed:
+                    print("Frame source disconnected during analysis.")
+                    break
+                if time.time() >= end_time:
+                    break
+                continue
+            
+            last_seq, timestamp, frame = item
+            if timestamp >= end_time:
+                break
+            yield timestamp, frame
+    
+    def analyze_reading(self, duration=10, progress_callback=None):
+        """
+        Run facial expression and eye tracking analysis at the same time.
+        
+        A single capture thread fills the frame buffer. Facial analysis runs on
+        the calling thread and hands each frame, with the faces it found, to
+        eye tracking on a shared eye worker, so faces are detected once per
+        frame, the session takes `duration` seconds instead of twice that and
+        the camera is opened only once. OpenCV windows may only be used from
+        the calling thread, so the eye worker hands its annotated frames back
+        and both windows are drawn by the facial loop.
+        Returns (facial_data, eye_data).
+        """
+        if not self.start_capture():
+            print("Cannot analyze reading without camera.")
+            return None, None
+        
+        handoff = queue.Queue(maxsize=FRAME_BUFFER_SIZE)
+        
+        def handed_off_frames():
+            while True:
+                item = handoff.get()
+                if item is None:
+                    return
+                yield item
+        
+        # Latest (frame, eye boxes, seconds remaining) from the eye worker, drawn on this thread
+        eye_view = [None]
+        
+        def keep_eye_view(frame, eye_boxes, remaining):
+            eye_view[0] = (frame, eye_boxes, remaining)
+        
+        eye_future = _eye_workers.submit(self.analyze_eye_tracking, duration, progress_callback, frames=handed_off_frames(),
+                                         on_eyes=None if self.headless else keep_eye_view)
+        
+        def hand_off(item):
+            # Frames are dropped rather than blocking if eye tracking has already stopped
+            while not eye_future.done():
+                try:
+                    handoff.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+        
+        def on_faces(timestamp, frame, faces):
+            hand_off((timestamp, frame, faces))
+            latest = eye_view[0]
+            if latest is not None:
+                # Shown alongside the facial window, whose waitKey() also services this one
+                cv2.imshow('Eye Tracking Analysis', annotate_frame(*latest, (0, 255, 0)))
+        
+        try:
+            facial_data = self.analyze_facial_expressions(duration, progress_callback, on_faces=on_faces)
+        finally:
+            hand_off(None)
+        eye_data = eye_future.result()
+        
+        return facial_data, eye_data
+    
     def start_audio_recording(self):
         """Start recording audio in a separate thread"""
         self.recording = True
@@ -62,12 +215,14 @@ class DyslexiaAnalysisSystem:
     def stop_audio_recording(self):
         """Stop the audio recording"""
         self.recording = False
-        if hasattr(self, 'audio_thread'):
+        if self.audio_thread is not None:
             self.audio_thread.join()
+            self.audio_thread = None
         print("Audio recording stopped.")
     
     def _record_audio(self):
         """Record audio from microphone"""
+        audio_key = None
         try:
             CHUNK = 1024
             FORMAT = pyaudio.paInt16
@@ -79,15 +234,17 @@ class DyslexiaAnalysisSystem:
                             channels=CHANNELS,
                             rate=RATE,
                             input=True,
+                            input_device_index=self.microphone_index,
                             frames_per_buffer=CHUNK)
             
-            frames = []
+            # Chunks go straight to the WAV file; only a short tail stays in memory
+            audio_key, audio_filename = self.artifacts.reserve("reading_audio", ".wav")
             
             print("* Recording audio...")
             
-            while self.recording:
-                data = stream.read(CHUNK)
-                frames.append(data)
+            with WavChunkWriter(audio_filename, RATE, CHANNELS, p.get_sample_size(FORMAT)) as writer:
+                while self.recording:
+                    writer.write(stream.read(CHUNK))
             
             print("* Audio recording complete.")
             
@@ -95,42 +252,40 @@ class DyslexiaAnalysisSystem:
             stream.close()
             p.terminate()
             
-            # Save audio file for analysis
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            audio_filename = os.path.join(self.results_directory, f"reading_audio_{timestamp}.wav")
-            
-            wf = wave.open(audio_filename, 'wb')
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(p.get_sample_size(FORMAT))
-            wf.setframerate(RATE)
-            wf.writeframes(b''.join(frames))
-            wf.close()
-            
+            self.artifacts.commit(audio_key, "audio/wav", rate=RATE, channels=CHANNELS, duration=writer.duration)
             print(f"Audio saved to {audio_filename}")
-            self.audio_data = {"filename": audio_filename, "frames": frames, "rate": RATE}
+            self.audio_data = {"filename": audio_filename, "rate": RATE, "duration": writer.duration}
             
         except Exception as e:
             print(f"Audio recording error: {str(e)}")
             self.recording = False
+            if audio_key is not None:
+                self.artifacts.abandon(audio_key)
     
-    def analyze_facial_expressions(self, duration=10):
+    def analyze_facial_expressions(self, duration=10, progress_callback=None, frames=None, on_faces=None):
         """
         Analyze facial expressions during reading for the specified duration
         
         In a production system, this would use a trained model for emotion detection.
         This simulation uses random data but with a proper framework for camera capture.
+        If given, progress_callback is called about once per second with a status dict.
+        Frames are read from the shared capture buffer unless a `frames` iterator is given.
+        If given, on_faces(timestamp, frame, faces) is called for every frame with the
+        detected face boxes (None if face detection is unavailable).
         """
-        if not self.initialize_camera():
-            print("Cannot analyze facial expressions without camera.")
-            return None
+        if frames is None:
+            if not self.start_capture():
+                print("Cannot analyze facial expressions without camera.")
+                return None
+            frames = self._iter_frames(duration)
         
-        # Load face cascade - required for face detection
+        # Face cascade (cached per thread) - required for face detection
         try:
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+            detector = FaceEyeDetector()
         except Exception as e:
             print(f"Error loading face cascade: {str(e)}")
             print("Using simulation mode for facial analysis.")
-            face_cascade = None
+            detector = None
         
         print(f"\nAnalyzing facial expressions for {duration} seconds...")
         print("Please read the text naturally while looking at the camera.")
@@ -146,33 +301,25 @@ class DyslexiaAnalysisSystem:
         
         total_frames = 0
         start_time = time.time()
+        last_reported = 0
         
-        while time.time() - start_time < duration:
-            if self.camera is None or not self.camera.isOpened():
-                print("Camera disconnected during analysis.")
-                break
-                
-            ret, frame = self.camera.read()
-            if not ret:
-                print("Failed to capture frame.")
-                continue
-                
+        for timestamp, frame in frames:
             total_frames += 1
             
-            # Display the frame with a countdown timer
-            remaining = int(duration - (time.time() - start_time))
-            cv2.putText(frame, f"Time remaining: {remaining}s", (10, 30), 
-                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            # Report progress roughly once per second
+            elapsed = int(time.time() - start_time)
+            if progress_callback is not None and elapsed > last_reported:
+                last_reported = elapsed
+                progress_callback(_progress_message("facial", "Analyzing facial expressions", elapsed, duration, frames=total_frames))
             
             # Face detection
-            if face_cascade is not None:
+            labelled_faces = []
+            faces = None
+            if detector is not None:
                 gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+                faces = detector.detect_faces(gray)
                 
                 for (x, y, w, h) in faces:
-                    # Draw rectangle around face
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
-                    
                     # In a real system, we would extract facial features and analyze them
                     # For simulation, we're using random emotion classification
                     # But we're only doing it when a face is detected
@@ -181,20 +328,25 @@ class DyslexiaAnalysisSystem:
                     weights = [0.4, 0.2, 0.2, 0.15, 0.05]  # Biased toward common expressions during reading
                     expression = random.choices(list(expressions_detected.keys()), weights=weights)[0]
                     expressions_detected[expression] += 1
-                    
-                    # Display detected emotion on frame
-                    cv2.putText(frame, f"Expression: {expression}", (x, y-10), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+                    labelled_faces.append(((x, y, w, h), f"Expression: {expression}"))
+            if on_faces is not None:
+                on_faces(timestamp, frame, faces)
             
-            # Display the frame
-            cv2.imshow('Facial Expression Analysis', frame)
+            # Drawing only happens for a throttled preview or a local window
+            remaining = int(duration - (time.time() - start_time))
+            if self.preview is not None and self.preview.due():
+                self.preview.publish(frame, labelled_faces, remaining, (255, 0, 0))
             
-            # Break loop on 'q' key press
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+            if not self.headless:
+                cv2.imshow('Facial Expression Analysis', annotate_frame(frame, labelled_faces, remaining, (255, 0, 0)))
+                
+                # Break loop on 'q' key press
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
         
         # Clean up
-        cv2.destroyAllWindows()
+        if not self.headless:
+            cv2.destroyAllWindows()
         
         # Calculate percentages
         total_expressions = sum(expressions_detected.values())
@@ -239,13 +391,21 @@ class DyslexiaAnalysisSystem:
         """
         Analyze the recorded audio for reading patterns.
         
-        This is a simulation, but the framework for actual audio analysis is included.
-        In a production system, this would use speech recognition and audio processing.
+        Hesitations, reading speed, rhythm and broken-off articulations are
+        measured from the signal energy of the client's streamed audio or the
+        saved recording. Without any audio the values are simulated.
         """
         print("\nAnalyzing audio recording of reading...")
         
-        # Check if we have audio data
-        if not hasattr(self, 'audio_data') or not self.audio_data:
+        features = None
+        if self.audio_stream is not None and self.audio_stream.total_frames:
+            # Audio streamed by the client has already been analyzed chunk by chunk
+            features = self.audio_stream.features()
+        elif self.audio_data:
+            # The saved recording is memory-mapped and analyzed in one vectorized pass
+            features = analyze_wav(self.audio_data["filename"])
+        
+        if features is None:
             print("No audio data available. Using simulation.")
             
             # Simulated values - would be replaced with actual audio analysis
@@ -255,22 +415,11 @@ class DyslexiaAnalysisSystem:
             reading_rhythm_score = random.uniform(60, 95)
             
         else:
-            # With real audio data, we would:
-            # 1. Use speech recognition to get the text
-            # 2. Compare with the expected text
-            # 3. Analyze timing, pauses, and pronunciation
-            
-            # For simulation purposes:
-            audio_duration = len(self.audio_data.get("frames", [])) * 1024 / self.audio_data.get("rate", 44100)
-            
-            # Assume the text is about 30 words
-            text_length = 30  # words
-            reading_speed = (text_length / audio_duration) * 60  # words per minute
-            
-            # Generate simulated values with some randomness
-            hesitations = random.randint(2, max(3, int(audio_duration / 3)))
-            pronunciation_errors = random.randint(1, max(2, int(audio_duration / 5)))
-            reading_rhythm_score = random.uniform(60, 95)
+            audio_duration = features["duration"]
+            reading_speed = features["reading_speed"]
+            hesitations = features["hesitations"]
+            pronunciation_errors = features["pronunciation_errors"]
+            reading_rhythm_score = features["reading_rhythm_score"]
         
         # Calculate fluency score based on multiple factors
         fluency_score = 100 - (hesitations * 2 + pronunciation_errors * 3)
@@ -303,77 +452,90 @@ class DyslexiaAnalysisSystem:
             "reading_rhythm_score": reading_rhythm_score,
             "overall_audio_score": overall_score
         }
+        if features is not None:
+            result["speech_rate_syllables_per_second"] = features["speech_rate_syllables_per_second"]
+            if "pause_histogram" in features:
+                result["pause_histogram"] = features["pause_histogram"]
         
         return result
     
-    def analyze_eye_tracking(self, duration=10):
+    def analyze_eye_tracking(self, duration=10, progress_callback=None, frames=None, on_eyes=None):
         """
         Analyze eye movements during reading.
         
         In a production system, this would use specialized eye tracking hardware
         or trained models for eye tracking through webcam.
+        If given, progress_callback is called about once per second with a status dict.
+        Frames are read from the shared capture buffer unless a `frames` iterator is given;
+        its items are (timestamp, frame), or (timestamp, frame, faces) when the face boxes
+        are already known (faces None means detect them here).
+        If given, on_eyes(frame, eye_boxes, seconds_remaining) receives every frame instead
+        of it being drawn in a local window, for callers not running on the main thread.
         """
-        if not self.initialize_camera():
-            print("Cannot analyze eye tracking without camera.")
-            return None
+        if frames is None:
+            if not self.start_capture():
+                print("Cannot analyze eye tracking without camera.")
+                return None
+            frames = self._iter_frames(duration)
             
         try:
-            # Load eye cascade for basic eye detection
-            eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+            # Face and eye cascades (cached per thread) for basic eye detection
+            detector = FaceEyeDetector()
         except Exception as e:
             print(f"Error loading eye cascade: {str(e)}")
             print("Using simulation mode for eye tracking.")
-            eye_cascade = None
+            detector = None
         
         print(f"\nAnalyzing eye movements for {duration} seconds...")
         print("Please read the text naturally while looking at the camera.")
         
-        # Prepare for analysis
-        eye_positions = []
+        # Prepare for analysis; gaze samples go into a preallocated structured array
+        gaze = GazeBuffer()
         start_time = time.time()
+        last_reported = 0
         
-        while time.time() - start_time < duration:
-            if self.camera is None or not self.camera.isOpened():
-                print("Camera disconnected during analysis.")
-                break
-                
-            ret, frame = self.camera.read()
-            if not ret:
-                print("Failed to capture frame.")
-                continue
-            
-            # Display the frame with a countdown timer
-            remaining = int(duration - (time.time() - start_time))
-            cv2.putText(frame, f"Time remaining: {remaining}s", (10, 30), 
-                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        for timestamp, frame, *known_faces in frames:
+            # Report progress roughly once per second
+            elapsed = int(time.time() - start_time)
+            if progress_callback is not None and elapsed > last_reported:
+                last_reported = elapsed
+                progress_callback(_progress_message("eyes", "Analyzing eye movements", elapsed, duration, samples=len(gaze)))
             
             # Eye detection 
-            if eye_cascade is not None:
+            eyes = []
+            if detector is not None:
+                # Only the upper part of each detected face is searched for eyes
                 gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                eyes = eye_cascade.detectMultiScale(gray, 1.3, 5)
+                faces = known_faces[0] if known_faces else None
+                if faces is None:
+                    faces = detector.detect_faces(gray)
+                eyes = detector.detect_eyes(gray, faces)
                 
-                for (ex, ey, ew, eh) in eyes:
-                    # Draw rectangle around eyes
-                    cv2.rectangle(frame, (ex, ey), (ex+ew, ey+eh), (0, 255, 0), 2)
-                    
-                    # Track eye position (center of detected eye region)
-                    eye_center = (ex + ew//2, ey + eh//2)
-                    eye_positions.append(eye_center)
-                    
-                    # In a real system, we would do more sophisticated eye tracking
-            
-            # Display the frame
-            cv2.imshow('Eye Tracking Analysis', frame)
+                # Track eye positions (center of each detected eye region), labeled by side of the face
+                for eye_id, (ex, ey, ew, eh) in label_eyes(eyes, faces):
+                    gaze.append(timestamp, ex + ew / 2, ey + eh / 2, eye_id)
             
-            # Break loop on 'q' key press
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+            # Drawing only happens for a throttled preview or a local window
+            remaining = int(duration - (time.time() - start_time))
+            eye_boxes = [(tuple(eye), None) for eye in eyes]
+            if self.preview is not None and self.preview.due():
+                self.preview.publish(frame, eye_boxes, remaining, (0, 255, 0))
+            
+            if on_eyes is not None:
+                on_eyes(frame, eye_boxes, remaining)
+            elif not self.headless:
+                cv2.imshow('Eye Tracking Analysis', annotate_frame(frame, eye_boxes, remaining, (0, 255, 0)))
+                
+                # Break loop on 'q' key press
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
         
         # Clean up
-        cv2.destroyAllWindows()
+        if on_eyes is None and not self.headless:
+            cv2.destroyAllWindows()
         
         # Analyze eye movements or use simulation if needed
-        if len(eye_positions) < 10:
+        if len(gaze) < 10:
             print("Insufficient eye tracking data. Using simulation.")
             # In a real system with insufficient data, we might ask the user to repeat
             # For this simulation, we'll generate data
@@ -382,28 +544,19 @@ class DyslexiaAnalysisSystem:
             fixations = random.randint(30, 100)
             regressions = random.randint(5, 30)
             saccades = random.randint(25, 80)
+            mean_fixation = 0.0
+            mean_amplitude = 0.0
             
         else:
-            # With real eye position data, we would:
-            # 1. Analyze the sequence of positions to detect fixations, saccades, and regressions
-            # 2. Calculate metrics based on these patterns
-            
-            # For simulation purposes - we'll just use the number of data points we have
-            # In a real system, this would be much more sophisticated
-            fixations = len(eye_positions) // 5
+            # Velocity-threshold classification of the whole recording in one vectorized pass
+            movements = classify_gaze(gaze.samples)
+            fixations = len(movements["fixation_durations"])
             
-            # Create some simulated patterns in the data
-            movements = []
-            for i in range(1, len(eye_positions)):
-                # X difference between consecutive points
-                x_diff = eye_positions[i][0] - eye_positions[i-1][0]
-                movements.append(x_diff)
-            
-            # Count negative x movements as regressions (reading right-to-left)
-            regressions = sum(1 for move in movements if move < -5)
-            
-            # Count positive x movements as saccades (reading left-to-right)
-            saccades = sum(1 for move in movements if move > 5)
+            # Leftward saccades are regressions (reading right-to-left), the rest move forward
+            regressions = movements["regressions"]
+            saccades = len(movements["saccade_amplitudes"]) - regressions
+            mean_fixation = float(movements["fixation_durations"].mean()) if fixations else 0.0
+            mean_amplitude = float(movements["saccade_amplitudes"].mean()) if len(movements["saccade_amplitudes"]) else 0.0
         
         # Calculate reading efficiency based on eye movements
         # Low regressions and appropriate saccades indicate efficient reading
@@ -429,10 +582,12 @@ class DyslexiaAnalysisSystem:
             "saccades_percentage": (saccades / max(1, fixations + saccades + regressions)) * 100,
             "eye_stability_percentage": stability,
             "saccade_efficiency_percentage": saccade_efficiency,
-            "reading_efficiency_score": efficiency_score
+            "reading_efficiency_score": efficiency_score,
+            "mean_fixation_duration": mean_fixation,
+            "mean_saccade_amplitude": mean_amplitude
         }
         
-        self.eye_positions = eye_positions
+        self.eye_positions = gaze.samples
         return result
     
     def generate_dyslexia_analysis_report(self, facial_data, audio_data, eye_data):
@@ -442,21 +597,25 @@ class DyslexiaAnalysisSystem:
         if not all([facial_data, audio_data, eye_data]):
             print("Missing data for complete analysis. Report may be incomplete.")
         
-        # Extract key metrics
+        # Extract key metrics (shared with the batch scorer in models/scoring.py)
+        metrics = extract_metrics(facial_data, audio_data, eye_data)
         dominant_expression = facial_data.get("dominant_expression", "neutral") if facial_data else "unknown"
-        confused_percent = facial_data.get("expressions", {}).get("confused", 0) if facial_data else 0
-        frustrated_percent = facial_data.get("expressions", {}).get("frustrated", 0) if facial_data else 0
+        confused_percent = metrics["confused_percent"]
+        frustrated_percent = metrics["frustrated_percent"]
         
         # Reading speed and fluency
-        reading_speed = audio_data.get("reading_speed", 0)
+        reading_speed = metrics["reading_speed"]
         fluency_score = audio_data.get("fluency_score", 0)
-        hesitations = audio_data.get("hesitations", 0)
-        pronunciation_errors = audio_data.get("pronunciation_errors", 0)
+        hesitations = metrics["hesitations"]
+        pronunciation_errors = metrics["pronunciation_errors"]
         
         # Eye tracking
-        regressions_percentage = eye_data.get("regressions_percentage", 0) if eye_data else 0
+        regressions_percentage = metrics["regressions_percentage"]
         efficiency_score = eye_data.get("reading_efficiency_score", 0) if eye_data else 0
         
+        thresholds = REPORT_THRESHOLDS
+        caps = INDICATOR_MAX_SCORES
+        
         # Potential dyslexia indicators with score contributions
         indicators = []
         indicator_scores = {}
@@ -464,44 +623,44 @@ class DyslexiaAnalysisSystem:
         max_possible_score = 0
         
         # Facial expression indicators
-        if confused_percent + frustrated_percent > 30:
-            score = min(25, (confused_percent + frustrated_percent - 30))
+        if confused_percent + frustrated_percent > thresholds["facial_expressions"]:
+            score = min(caps["facial_expressions"], (confused_percent + frustrated_percent - thresholds["facial_expressions"]))
             indicators.append(f"Facial expressions indicating reading difficulty: {confused_percent+frustrated_percent:.1f}%")
             indicator_scores["facial_expressions"] = score
             total_score += score
-        max_possible_score += 25
+        max_possible_score += caps["facial_expressions"]
         
         # Reading speed indicators
-        if reading_speed < 120:
-            score = min(20, (120 - reading_speed) / 2)
+        if reading_speed < thresholds["reading_speed"]:
+            score = min(caps["reading_speed"], (thresholds["reading_speed"] - reading_speed) / 2)
             indicators.append(f"Reading speed below average: {reading_speed:.1f} words per minute")
             indicator_scores["reading_speed"] = score
             total_score += score
-        max_possible_score += 20
+        max_possible_score += caps["reading_speed"]
         
         # Hesitation indicators
-        if hesitations > 5:
-            score = min(15, (hesitations - 5) * 2)
+        if hesitations > thresholds["hesitations"]:
+            score = min(caps["hesitations"], (hesitations - thresholds["hesitations"]) * 2)
             indicators.append(f"Frequent hesitations while reading: {hesitations} detected")
             indicator_scores["hesitations"] = score
             total_score += score
-        max_possible_score += 15
+        max_possible_score += caps["hesitations"]
         
         # Pronunciation indicators
-        if pronunciation_errors > 3:
-            score = min(15, (pronunciation_errors - 3) * 3)
+        if pronunciation_errors > thresholds["pronunciation"]:
+            score = min(caps["pronunciation"], (pronunciation_errors - thresholds["pronunciation"]) * 3)
             indicators.append(f"Multiple pronunciation errors: {pronunciation_errors} detected")
             indicator_scores["pronunciation"] = score
             total_score += score
-        max_possible_score += 15
+        max_possible_score += caps["pronunciation"]
         
         # Eye tracking indicators
-        if regressions_percentage > 20:
-            score = min(25, (regressions_percentage - 20) * 1.5)
+        if regressions_percentage > thresholds["regressions"]:
+            score = min(caps["regressions"], (regressions_percentage - thresholds["regressions"]) * 1.5)
             indicators.append(f"High percentage of backward eye movements: {regressions_percentage:.1f}%")
             indicator_scores["regressions"] = score
             total_score += score
-        max_possible_score += 25
+        max_possible_score += caps["regressions"]
         
         # Calculate overall dyslexia likelihood percentage
         if max_possible_score > 0:
@@ -510,15 +669,8 @@ class DyslexiaAnalysisSystem:
             dyslexia_likelihood = 0
         
         # Generate risk assessment
-        if dyslexia_likelihood >= 60:
-            risk_level = "High"
-            confidence = min(95, 70 + (dyslexia_likelihood - 60))
-        elif dyslexia_likelihood >= 30:
-            risk_level = "Moderate"
-            confidence = min(90, 60 + (dyslexia_likelihood - 30))
-        else:
-            risk_level = "Low"
-            confidence = min(85, 50 + dyslexia_likelihood)
+        risk_level, confidence_cap, confidence_base, band_start = RISK.lookup(dyslexia_likelihood)
+        confidence = min(confidence_cap, confidence_base + (dyslexia_likelihood - band_start))
         
         # Generate detailed reading profile
         reading_profile = {
@@ -551,7 +703,7 @@ class DyslexiaAnalysisSystem:
             reading_profile["strengths"].append("Reading motivation and engagement")
             
         # If no challenges identified but risk is moderate or high, add a generic one
-        if not reading_profile["challenges"] and dyslexia_likelihood >= 30:
+        if not reading_profile["challenges"] and risk_level != "Low":
             reading_profile["challenges"].append("Subtle reading efficiency issues")
         
         return {
@@ -566,79 +718,10 @@ class DyslexiaAnalysisSystem:
     def visualize_results(self, facial_data, audio_data, eye_data, report):
         """Generate visualizations of the analysis results"""
         try:
-            # Create a timestamp for unique filenames
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # Create a figure with subplots
-            fig = plt.figure(figsize=(15, 10))
-            
-            # 1. Facial Expression Analysis
-            if facial_data:
-                ax1 = fig.add_subplot(221)
-                expressions = facial_data.get("expressions", {})
-                if expressions:
-                    labels = list(expressions.keys())
-                    values = list(expressions.values())
-                    ax1.bar(labels, values, color='skyblue')
-                    ax1.set_title('Facial Expression Analysis')
-                    ax1.set_ylabel('Percentage (%)')
-                    plt.setp(ax1.get_xticklabels(), rotation=45, ha='right')
-            
-            # 2. Audio Analysis
-            if audio_data:
-                ax2 = fig.add_subplot(222)
-                audio_metrics = [
-                    ('Fluency', audio_data.get('fluency_score', 0)),
-                    ('Speech Clarity', audio_data.get('speech_clarity_percentage', 0)),
-                    ('Reading Rhythm', audio_data.get('reading_rhythm_score', 0)),
-                    ('Overall Score', audio_data.get('overall_audio_score', 0))
-                ]
-                labels = [item[0] for item in audio_metrics]
-                values = [item[1] for item in audio_metrics]
-                ax2.bar(labels, values, color='lightgreen')
-                ax2.set_title('Audio Analysis')
-                ax2.set_ylabel('Score (%)')
-                ax2.set_ylim(0, 100)
-            
-            # 3. Eye Tracking Analysis
-            if eye_data:
-                ax3 = fig.add_subplot(223)
-                eye_metrics = [
-                    ('Fixations', eye_data.get('fixations_percentage', 0)),
-                    ('Regressions', eye_data.get('regressions_percentage', 0)),
-                    ('Saccades', eye_data.get('saccades_percentage', 0)),
-                    ('Efficiency', eye_data.get('reading_efficiency_score', 0))
-                ]
-                labels = [item[0] for item in eye_metrics]
-                values = [item[1] for item in eye_metrics]
-                ax3.bar(labels, values, color='salmon')
-                ax3.set_title('Eye Movement Analysis')
-                ax3.set_ylabel('Percentage (%)')
-                ax3.set_ylim(0, 100)
-            
-            # 4. Overall Dyslexia Likelihood
-            if report:
-                ax4 = fig.add_subplot(224)
-                likelihood = report.get('dyslexia_likelihood_percentage', 0)
-                confidence = report.get('confidence_percentage', 0)
-                
-                # Create gauge chart showing dyslexia likelihood
-                gauge_values = [likelihood, 100-likelihood]
-                labels = ['Likelihood', '']
-                colors = ['red' if likelihood > 60 else 'orange' if likelihood > 30 else 'green', 'lightgrey']
-                ax4.pie(gauge_values, labels=labels, colors=colors, startangle=90, counterclock=False)
-                center_circle = plt.Circle((0, 0), 0.7, fc='white')
-                ax4.add_patch(center_circle)
-                ax4.text(0, 0, f"{likelihood:.1f}%\n{report.get('risk_level', 'Unknown')}", 
-                         ha='center', va='center', fontsize=16)
-                ax4.set_title(f'Dyslexia Likelihood (Confidence: {confidence:.1f}%)')
-            
-            plt.tight_layout()
-            
-            # Save the figure
-            results_file = os.path.join(self.results_directory, f"dyslexia_analysis_{timestamp}.png")
-            plt.savefig(results_file)
-            plt.close()
+            png = render_report_png(facial_data, audio_data, eye_data, report)
+            
+            # Save the figure under a unique key
+            results_file = self.artifacts.put_bytes(self.artifacts.new_key("dyslexia_analysis", ".png"), png, "image/png")
             
             print(f"\nResults visualization saved to {results_file}")
             return results_file
@@ -676,21 +759,16 @@ class DyslexiaAnalysisSystem:
         # Start audio recording in background
         self.start_audio_recording()
         
-        # Analyze facial expressions and eye tracking
-        # In a real system we would do these simultaneously with different cameras
-        # or alternate between them automatically
-        
-        print("\nStarting analysis phase 1/3: Facial expressions")
-        facial_data = self.analyze_facial_expressions(duration=10)
-        
-        print("\nStarting analysis phase 2/3: Eye tracking")
-        eye_data = self.analyze_eye_tracking(duration=10)
+        # Analyze facial expressions and eye tracking simultaneously
+        # from the same camera frames
+        print("\nStarting analysis phase 1/2: Facial expressions and eye tracking")
+        facial_data, eye_data = self.analyze_reading(duration=10)
         
         # Stop audio recording
         self.stop_audio_recording()
         
         # Analyze audio data
-        print("\nStarting analysis phase 3/3: Audio analysis")
+        print("\nStarting analysis phase 2/2: Audio analysis")
         audio_data = self.analyze_audio()
         
         # Release camera
@@ -798,12 +876,12 @@ class DyslexiaAnalysisSystem:
             print("RECOMMENDATIONS")
             print("-"*40)
             
-            if report['dyslexia_likelihood_percentage'] >= 60:
+            if report['risk_level'] == "High":
                 print("1. Consider a professional evaluation with a dyslexia specialist.")
                 print("2. Explore structured literacy programs and multi-sensory learning techniques.")
                 print("3. Consider assistive technology for reading (text-to-speech, specialized fonts).")
                 print("4. Practice with reading materials that gradually increase in complexity.")
-            elif report['dyslexia_likelihood_percentage'] >= 30:
+            elif report['risk_level'] == "Moderate":
                 print("1. Monitor reading progress and consider follow-up screening.")
                 print("2. Practice reading fluency with appropriate level materials.")
                 print("3. Explore techniques to improve reading efficiency.")
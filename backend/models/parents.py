@@ -1,5 +1,148 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+import csv
+import hashlib
+import io
 import json
+import math
+import os
+import threading
+from types import MappingProxyType
+
+import numpy as np
+
+from models.rules import RECOMMENDATIONS, RULES_VERSION, SEVERITY
+
+# Question bank read by analyze_dyslexia_responses, relative to the working directory
+QUESTIONS_FILE = "questions.json"
+
+# Leading CSV columns of a batch upload; the remaining columns are question ids
+CSV_CHILD_COLUMNS = ("child_name", "child_age")
+
+# Inclusive range of a questionnaire response value
+RESPONSE_MIN, RESPONSE_MAX = 0.0, 100.0
+
+# Limits on the child details stored and echoed back with each result
+CHILD_AGE_MIN, CHILD_AGE_MAX = 0, 25
+MAX_CHILD_NAME_LENGTH = 100
+
+
+class QuestionBank:
+    """
+    Precompiled, read-only index of a questions.json file.
+
+    Questions are numbered grouped by category, in `categories` order and
+    file order within a category (the order the scores have always been
+    summed in). question_categories[i] is the position in `categories` of
+    question i's category and category_sizes holds the number of questions
+    per category. Questions whose category is not listed under
+    "categories" are left out, as they never counted towards a score.
+    version is the file's (mtime, size) and digest a hash of its content.
+    """
+
+    def __init__(self, questions_data, version=None, digest=None):
+        categories = questions_data["categories"]
+        category_positions = {category: position for position, category in enumerate(categories)}
+        questions = sorted(
+            (question for question in questions_data["questions"] if question["category"] in category_positions),
+            key=lambda question: category_positions[question["category"]]
+        )
+
+        self.version = version
+        self.digest = digest
+        self.categories = tuple(categories)
+        self.category_names = tuple(categories[category] for category in self.categories)
+        self.question_ids = tuple(question["id"] for question in questions)
+        self.question_positions = MappingProxyType({question_id: position for position, question_id in enumerate(self.question_ids)})
+        self.question_categories = np.array([category_positions[question["category"]] for question in questions], dtype=np.intp)
+        self.category_sizes = np.bincount(self.question_categories, minlength=len(self.categories))
+        self.question_categories.setflags(write=False)
+        self.category_sizes.setflags(write=False)
+
+    def response_vector(self, responses: Dict[str, float]) -> np.ndarray:
+        """One row of response values in question order; NaN where a question was not answered"""
+        return np.fromiter(
+            (responses.get(question_id, np.nan) for question_id in self.question_ids),
+            dtype=np.float64, count=len(self.question_ids)
+        )
+
+    def score(self, values: np.ndarray):
+        """
+        Category scores and overall score for one response vector.
+
+        A category score is the sum of its answered questions divided by
+        the number of questions in the category; the overall score is the
+        mean of all answered questions.
+        """
+        answered = ~np.isnan(values)
+        answered_values = values[answered]
+        category_totals = np.bincount(self.question_categories[answered], weights=answered_values, minlength=len(self.categories))
+        category_scores = np.divide(category_totals, self.category_sizes, out=np.zeros(len(self.categories)), where=self.category_sizes > 0)
+        # cumsum adds strictly left to right, so totals match a running sum to the last bit
+        overall_score = answered_values.cumsum()[-1] / len(answered_values) if len(answered_values) else 0.0
+        return category_scores, float(overall_score)
+
+    def response_matrix(self, responses_list: List[Dict[str, float]]) -> np.ndarray:
+        """Children x questions matrix of response values in question order; NaN where not answered"""
+        values = np.full((len(responses_list), len(self.question_ids)), np.nan)
+        positions = self.question_positions
+        for row, responses in enumerate(responses_list):
+            for question_id, value in responses.items():
+                position = positions.get(question_id)
+                if position is not None:
+                    values[row, position] = value
+        return values
+
+    def score_matrix(self, values: np.ndarray):
+        """
+        score() for every row of a children x questions matrix at once.
+
+        Columns are added one question at a time across all rows, in the
+        same order score() sums them, so each row's scores are identical to
+        scoring it on its own.
+        """
+        answered = ~np.isnan(values)
+        filled = np.where(answered, values, 0.0)
+        category_totals = np.zeros((len(values), len(self.categories)))
+        total = np.zeros(len(values))
+        for question, category in enumerate(self.question_categories):
+            category_totals[:, category] += filled[:, question]
+            total += filled[:, question]
+        category_scores = np.divide(category_totals, self.category_sizes, out=np.zeros_like(category_totals), where=self.category_sizes > 0)
+        answered_count = answered.sum(axis=1)
+        overall_scores = np.divide(total, answered_count, out=np.zeros(len(values)), where=answered_count > 0)
+        return category_scores, overall_scores
+
+
+_banks = {}
+_banks_lock = threading.Lock()
+
+
+def get_question_bank(filename: str = QUESTIONS_FILE) -> QuestionBank:
+    """The parsed question bank for filename, re-read only when the file's mtime changes"""
+    stat_result = os.stat(filename)
+    version = (stat_result.st_mtime_ns, stat_result.st_size)
+    bank = _banks.get(filename)
+    if bank is not None and bank.version == version:
+        return bank
+
+    with _banks_lock:
+        bank = _banks.get(filename)
+        if bank is None or bank.version != version:
+            with open(filename, "rb") as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()[:16]
+            bank = _banks[filename] = QuestionBank(json.loads(content), version, digest)
+        return bank
+
+
+def responses_cache_key(responses: Dict[str, float], bank: QuestionBank) -> str:
+    """Content hash of a response set and the question bank and rules that score it"""
+    payload = json.dumps(
+        {"responses": responses, "question_bank": bank.digest, "rules_version": RULES_VERSION},
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 
 def analyze_dyslexia_responses(child_name: str, child_age: int, responses: Dict[str, int]) -> Dict[str, Any]:
     """
@@ -13,49 +156,12 @@ def analyze_dyslexia_responses(child_name: str, child_age: int, responses: Dict[
     Returns:
         Dictionary containing analysis results
     """
-    # Load questions data
-    with open("questions.json", "r") as f:
-        questions_data = json.load(f)
-    
-    questions = questions_data["questions"]
-    categories = questions_data["categories"]
+    bank = get_question_bank()
     
-    # Organize questions by category
-    category_questions = {}
-    for category in categories.keys():
-        category_questions[category] = []
-    
-    for question in questions:
-        category = question["category"]
-        if category in category_questions:
-            category_questions[category].append(question["id"])
-    
-    # Calculate category scores
-    category_scores = {}
-    total_score = 0
-    question_count = 0
-    
-    for category, question_ids in category_questions.items():
-        if not question_ids:
-            category_scores[category] = 0
-            continue
-            
-        category_score = 0
-        for q_id in question_ids:
-            if q_id in responses:
-                # For questions where a high score indicates dyslexia tendency (most questions)
-                # The higher the response value, the higher the dyslexia indicator
-                category_score += responses[q_id]
-                total_score += responses[q_id]
-                question_count += 1
-        
-        if len(question_ids) > 0:
-            category_scores[category] = category_score / len(question_ids)
-        else:
-            category_scores[category] = 0
-    
-    # Calculate overall score
-    overall_score = total_score / question_count if question_count > 0 else 0
+    # For questions where a high score indicates dyslexia tendency (most questions)
+    # The higher the response value, the higher the dyslexia indicator
+    scores, overall_score = bank.score(bank.response_vector(responses))
+    category_scores = dict(zip(bank.categories, scores.tolist()))
     
     # Determine severity level
     severity_level = determine_severity(overall_score)
@@ -65,7 +171,7 @@ def analyze_dyslexia_responses(child_name: str, child_age: int, responses: Dict[
     
     return {
         "overall_score": round(overall_score, 2),
-        "category_scores": {categories[k]: round(v, 2) for k, v in category_scores.items()},
+        "category_scores": {name: round(score, 2) for name, score in zip(bank.category_names, scores.tolist())},
         "recommendations": recommendations,
         "severity_level": severity_level,
         "child_info": {
@@ -74,141 +180,100 @@ def analyze_dyslexia_responses(child_name: str, child_age: int, responses: Dict[
         }
     }
 
+def score_responses_batch(values: np.ndarray, bank: QuestionBank = None) -> Dict[str, np.ndarray]:
+    """
+    Score a children x questions response matrix (columns in bank.question_ids
+    order, NaN for unanswered) in one pass.
+
+    Returns category_scores (children x categories, in bank.categories
+    order), overall_score and severity_level arrays with the same values
+    analyze_dyslexia_responses gives for each child.
+    """
+    bank = bank or get_question_bank()
+    category_scores, overall_scores = bank.score_matrix(values)
+    severity_levels = np.asarray(SEVERITY.outcomes)[SEVERITY.bands(overall_scores)]
+    return {
+        "category_scores": category_scores,
+        "overall_score": overall_scores,
+        "severity_level": severity_levels,
+    }
+
+
+def check_response(value: float, row_label: str, question_id: str) -> None:
+    """Reject NaN, infinities and values outside RESPONSE_MIN..RESPONSE_MAX, naming the row"""
+    if not math.isfinite(value) or not RESPONSE_MIN <= value <= RESPONSE_MAX:
+        raise ValueError(f"{row_label}: response {question_id} must be a number from {RESPONSE_MIN:g} to {RESPONSE_MAX:g}")
+
+
+def check_child(name: Any, age: Any, row_label: str) -> None:
+    """Reject a child name that is not a short string and an age outside CHILD_AGE_MIN..CHILD_AGE_MAX (None is allowed)"""
+    if not isinstance(name, str) or len(name) > MAX_CHILD_NAME_LENGTH:
+        raise ValueError(f"{row_label}: child_name must be a string of at most {MAX_CHILD_NAME_LENGTH} characters")
+    if age is not None and (isinstance(age, bool) or not isinstance(age, int) or not CHILD_AGE_MIN <= age <= CHILD_AGE_MAX):
+        raise ValueError(f"{row_label}: child_age must be a whole number from {CHILD_AGE_MIN} to {CHILD_AGE_MAX}")
+
+
+def read_responses_json(children: List[Dict[str, Any]], bank: QuestionBank):
+    """Child names, ages and response matrix from a list of {child_name, child_age, responses} objects"""
+    names, ages, responses_list = [], [], []
+    for row, child in enumerate(children):
+        if not isinstance(child, dict) or not isinstance(child.get("responses"), dict):
+            raise ValueError(f"Child {row}: expected an object with a responses object")
+        for question_id, value in child["responses"].items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Child {row}: response {question_id} is not a number")
+            check_response(value, f"Child {row}", question_id)
+        check_child(child.get("child_name"), child.get("child_age"), f"Child {row}")
+        names.append(child.get("child_name"))
+        ages.append(child.get("child_age"))
+        responses_list.append(child["responses"])
+    return names, ages, bank.response_matrix(responses_list)
+
+
+def read_responses_csv(text: str, bank: QuestionBank):
+    """
+    Child names, ages and response matrix from CSV with a child_name,
+    child_age, <question id>... header. Empty cells are unanswered
+    questions; columns that are not questions of the bank are ignored.
+    """
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, None)
+    if header is None or tuple(column.strip() for column in header[:2]) != CSV_CHILD_COLUMNS:
+        raise ValueError("CSV header must start with child_name,child_age")
+
+    columns = [(index, bank.question_positions[column.strip()]) for index, column in enumerate(header)
+               if index >= 2 and column.strip() in bank.question_positions]
+    names, ages, rows = [], [], []
+    for line, record in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in record):
+            continue
+        record = record + [""] * (len(header) - len(record))
+        row = [np.nan] * len(bank.question_ids)
+        try:
+            for index, position in columns:
+                cell = record[index].strip()
+                if cell:
+                    row[position] = float(cell)
+            ages.append(int(record[1]) if record[1].strip() else None)
+        except ValueError:
+            raise ValueError(f"Line {line}: responses and child_age must be numbers")
+        for index, position in columns:
+            if record[index].strip():
+                check_response(row[position], f"Line {line}", header[index].strip())
+        check_child(record[0], ages[-1], f"Line {line}")
+        names.append(record[0])
+        rows.append(row)
+    return names, ages, np.array(rows, dtype=np.float64).reshape(len(rows), len(bank.question_ids))
+
+
 def determine_severity(overall_score: float) -> str:
     """Determine the severity level based on the overall score."""
-    if overall_score < 20:
-        return "Minimal or No Indicators"
-    elif overall_score < 40:
-        return "Mild Indicators"
-    elif overall_score < 60:
-        return "Moderate Indicators"
-    elif overall_score < 80:
-        return "Significant Indicators"
-    else:
-        return "Strong Indicators"
-
-def generate_recommendations(category_scores: Dict[str, float]) -> Dict[str, List[str]]:
-    """Generate recommendations based on category scores."""
-    recommendations = {}
-    
-    # Phonological Awareness
-    if "phonological_awareness" in category_scores:
-        score = category_scores["phonological_awareness"]
-        recs = []
-        if score >= 50:
-            recs = [
-                "Practice breaking words into individual sounds (phonemes)",
-                "Play rhyming games and focus on word families",
-                "Use letter tiles or cards to build and segment words",
-                "Try the Orton-Gillingham approach for phonics instruction",
-                "Use apps like 'Phonics Hero' or 'Phonics Monster'"
-            ]
-        elif score >= 25:
-            recs = [
-                "Read books with rhyming patterns",
-                "Practice clapping syllables in words",
-                "Play word games that focus on beginning sounds"
-            ]
-        recommendations["Phonological Awareness"] = recs
-    
-    # Visual Processing
-    if "visual_processing" in category_scores:
-        score = category_scores["visual_processing"]
-        recs = []
-        if score >= 50:
-            recs = [
-                "Use colored overlays when reading",
-                "Try larger font sizes and increased spacing between lines",
-                "Practice visual tracking exercises",
-                "Use a ruler or reading guide to keep place when reading",
-                "Consider vision therapy assessment"
-            ]
-        elif score >= 25:
-            recs = [
-                "Reduce visual clutter in reading materials",
-                "Practice visual discrimination activities",
-                "Try different font styles to find what works best"
-            ]
-        recommendations["Visual Processing"] = recs
-    
-    # Reading Fluency
-    if "reading_fluency" in category_scores:
-        score = category_scores["reading_fluency"]
-        recs = []
-        if score >= 50:
-            recs = [
-                "Practice repeated reading of the same passages",
-                "Try paired reading with a parent or tutor",
-                "Use audiobooks alongside printed text",
-                "Practice sight word recognition daily",
-                "Consider structured reading programs like 'Barton Reading'"
-            ]
-        elif score >= 25:
-            recs = [
-                "Read aloud daily for short periods",
-                "Choose high-interest, lower-level texts",
-                "Celebrate improvements in speed and accuracy"
-            ]
-        recommendations["Reading Fluency"] = recs
-    
-    # Working Memory
-    if "working_memory" in category_scores:
-        score = category_scores["working_memory"]
-        recs = []
-        if score >= 50:
-            recs = [
-                "Break instructions into smaller steps",
-                "Use memory games and activities daily",
-                "Create visual checklists and reminders",
-                "Practice visualization techniques",
-                "Try working memory apps like 'Cogmed' or 'Lumosity'"
-            ]
-        elif score >= 25:
-            recs = [
-                "Use mnemonic devices for remembering sequences",
-                "Practice recall activities with increasing complexity",
-                "Use visual and verbal cues together"
-            ]
-        recommendations["Working Memory"] = recs
-    
-    # Reading Comprehension
-    if "reading_comprehension" in category_scores:
-        score = category_scores["reading_comprehension"]
-        recs = []
-        if score >= 50:
-            recs = [
-                "Pre-teach vocabulary before reading new material",
-                "Use graphic organizers to map out story elements",
-                "Practice visualization while reading",
-                "Implement the 'Question-Answer-Relationship' (QAR) strategy",
-                "Try reciprocal teaching methods"
-            ]
-        elif score >= 25:
-            recs = [
-                "Discuss stories before and after reading",
-                "Ask prediction questions while reading",
-                "Create story maps for narrative texts"
-            ]
-        recommendations["Reading Comprehension"] = recs
-    
-    # Spelling & Writing
-    if "spelling" in category_scores:
-        score = category_scores["spelling"]
-        recs = []
-        if score >= 50:
-            recs = [
-                "Use multisensory spelling methods (see, say, cover, write, check)",
-                "Focus on spelling patterns rather than memorization",
-                "Try assistive technology like spell checkers or dictation software",
-                "Practice word sorting by spelling patterns",
-                "Consider structured spelling programs like 'All About Spelling'"
-            ]
-        elif score >= 25:
-            recs = [
-                "Create personalized spelling lists based on errors",
-                "Use tactile methods like writing in sand or with textured materials",
-                "Focus on high-frequency words first"
-            ]
-        recommendations["Spelling & Writing"] = recs
-    
-    return recommendations
\ No newline at end of file
+    return SEVERITY.lookup(overall_score)
+
+def generate_recommendations(category_scores: Dict[str, float]) -> Dict[str, Tuple[str, ...]]:
+    """Generate recommendations based on category scores; the lists are shared and read-only."""
+    return {
+        title: table.lookup(category_scores[category])
+        for category, title, table in RECOMMENDATIONS
+        if category in category_scores
+    }
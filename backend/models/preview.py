@@ -0,0 +1,55 @@
+import threading
+import time
+
+import cv2
+
+
+def annotate_frame(frame, boxes, remaining, color):
+    """
+    Return a copy of frame with the countdown and detection boxes drawn on it.
+
+    boxes is a list of ((x, y, w, h), label) pairs; label may be None.
+    The input frame is never modified since it can be shared between analyzers.
+    """
+    annotated = frame.copy()
+    cv2.putText(annotated, f"Time remaining: {remaining}s", (10, 30),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+    for (x, y, w, h), label in boxes:
+        cv2.rectangle(annotated, (x, y), (x + w, y + h), color, 2)
+        if label:
+            cv2.putText(annotated, label, (x, y - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    return annotated
+
+
+class PreviewStream:
+    """
+    Optional annotated preview output for a remote viewer.
+
+    Analyzers call due() every frame, which is cheap; only when it returns
+    True do they pay for drawing and JPEG encoding, at most max_fps times a
+    second across every analyzer publishing to the same stream.
+    """
+
+    def __init__(self, callback, max_fps=2, jpeg_quality=70):
+        if not max_fps > 0:
+            raise ValueError(f"Preview rate must be positive, got {max_fps}")
+        self.callback = callback
+        self.interval = 1.0 / max_fps
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def due(self):
+        """Claim the next preview slot if the throttle interval has passed"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_time:
+                return False
+            self._next_time = now + self.interval
+            return True
+
+    def publish(self, frame, boxes, remaining, color):
+        ok, encoded = cv2.imencode(".jpg", annotate_frame(frame, boxes, remaining, color), self.encode_params)
+        if ok:
+            self.callback(encoded.tobytes())
@@ -0,0 +1,74 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from models.rules import RULES_VERSION
+from models.scoring import SCORING_VERSION
+
+
+def report_cache_key(facial_data, audio_data, eye_data, scoring_version=SCORING_VERSION):
+    """Content hash of a session's input metrics and the scoring and rules versions that will read them"""
+    payload = json.dumps(
+        {"facial": facial_data, "audio": audio_data, "eyes": eye_data, "scoring_version": scoring_version,
+         "rules_version": RULES_VERSION},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """
+    Bounded cache of generated reports keyed by report_cache_key.
+
+    Entries are evicted least recently used first once max_entries is
+    exceeded, and expire max_age seconds after they were stored. Callers get
+    copies, so a cached report can never be changed through a response.
+    """
+
+    def __init__(self, max_entries=256, max_age=3600):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self.max_age:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key, report):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(report))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_age_seconds": self.max_age,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,198 @@
+from bisect import bisect_right
+
+import numpy as np
+
+# Bump whenever a bound or outcome below changes; cached results record it
+RULES_VERSION = 1
+
+# Every banded scoring rule. A rule's ascending `bounds` split the scored
+# value into len(bounds) + 1 bands: below bounds[0] gives outcomes[0], from
+# bounds[i - 1] up to (not including) bounds[i] gives outcomes[i], and
+# bounds[-1] and above gives outcomes[-1].
+RULES = {
+    # Parent questionnaire overall score
+    "severity": {
+        "bounds": (20, 40, 60, 80),
+        "outcomes": (
+            "Minimal or No Indicators",
+            "Mild Indicators",
+            "Moderate Indicators",
+            "Significant Indicators",
+            "Strong Indicators",
+        ),
+    },
+    # Reading session dyslexia likelihood: (risk level, confidence cap, confidence base, band start);
+    # confidence is min(cap, base + (likelihood - start))
+    "risk": {
+        "bounds": (30, 60),
+        "outcomes": (
+            ("Low", 85, 50, 0),
+            ("Moderate", 90, 60, 30),
+            ("High", 95, 70, 60),
+        ),
+    },
+    # Parent questionnaire category scores, listed in the order recommendations are reported
+    "recommendations": {
+        "phonological_awareness": {
+            "title": "Phonological Awareness",
+            "bounds": (25, 50),
+            "outcomes": (
+                (),
+                (
+                    "Read books with rhyming patterns",
+                    "Practice clapping syllables in words",
+                    "Play word games that focus on beginning sounds",
+                ),
+                (
+                    "Practice breaking words into individual sounds (phonemes)",
+                    "Play rhyming games and focus on word families",
+                    "Use letter tiles or cards to build and segment words",
+                    "Try the Orton-Gillingham approach for phonics instruction",
+                    "Use apps like 'Phonics Hero' or 'Phonics Monster'",
+                ),
+            ),
+        },
+        "visual_processing": {
+            "title": "Visual Processing",
+            "bounds": (25, 50),
+            "outcomes": (
+                (),
+                (
+                    "Reduce visual clutter in reading materials",
+                    "Practice visual discrimination activities",
+                    "Try different font styles to find what works best",
+                ),
+                (
+                    "Use colored overlays when reading",
+                    "Try larger font sizes and increased spacing between lines",
+                    "Practice visual tracking exercises",
+                    "Use a ruler or reading guide to keep place when reading",
+                    "Consider vision therapy assessment",
+                ),
+            ),
+        },
+        "reading_fluency": {
+            "title": "Reading Fluency",
+            "bounds": (25, 50),
+            "outcomes": (
+                (),
+                (
+                    "Read aloud daily for short periods",
+                    "Choose high-interest, lower-level texts",
+                    "Celebrate improvements in speed and accuracy",
+                ),
+                (
+                    "Practice repeated reading of the same passages",
+                    "Try paired reading with a parent or tutor",
+                    "Use audiobooks alongside printed text",
+                    "Practice sight word recognition daily",
+                    "Consider structured reading programs like 'Barton Reading'",
+                ),
+            ),
+        },
+        "working_memory": {
+            "title": "Working Memory",
+            "bounds": (25, 50),
+            "outcomes": (
+                (),
+                (
+                    "Use mnemonic devices for remembering sequences",
+                    "Practice recall activities with increasing complexity",
+                    "Use visual and verbal cues together",
+                ),
+                (
+                    "Break instructions into smaller steps",
+                    "Use memory games and activities daily",
+                    "Create visual checklists and reminders",
+                    "Practice visualization techniques",
+                    "Try working memory apps like 'Cogmed' or 'Lumosity'",
+                ),
+            ),
+        },
+        "reading_comprehension": {
+            "title": "Reading Comprehension",
+            "bounds": (25, 50),
+            "outcomes": (
+                (),
+                (
+                    "Discuss stories before and after reading",
+                    "Ask prediction questions while reading",
+                    "Create story maps for narrative texts",
+                ),
+                (
+                    "Pre-teach vocabulary before reading new material",
+                    "Use graphic organizers to map out story elements",
+                    "Practice visualization while reading",
+                    "Implement the 'Question-Answer-Relationship' (QAR) strategy",
+                    "Try reciprocal teaching methods",
+                ),
+            ),
+        },
+        "spelling": {
+            "title": "Spelling & Writing",
+            "bounds": (25, 50),
+            "outcomes": (
+                (),
+                (
+                    "Create personalized spelling lists based on errors",
+                    "Use tactile methods like writing in sand or with textured materials",
+                    "Focus on high-frequency words first",
+                ),
+                (
+                    "Use multisensory spelling methods (see, say, cover, write, check)",
+                    "Focus on spelling patterns rather than memorization",
+                    "Try assistive technology like spell checkers or dictation software",
+                    "Practice word sorting by spelling patterns",
+                    "Consider structured spelling programs like 'All About Spelling'",
+                ),
+            ),
+        },
+    },
+}
+
+
+class DecisionTable:
+    """
+    One banded rule compiled for lookup.
+
+    lookup() is a bisect over the bounds; bands() does the same for a
+    whole NumPy array. Outcomes are shared between all callers and must
+    not be modified.
+    """
+
+    def __init__(self, bounds, outcomes):
+        if list(bounds) != sorted(bounds) or len(outcomes) != len(bounds) + 1:
+            raise ValueError("A decision table needs ascending bounds and one more outcome than bounds")
+        self.bounds = tuple(bounds)
+        self.outcomes = tuple(outcomes)
+        self.bounds_array = np.array(self.bounds, dtype=np.float64)
+        self.bounds_array.setflags(write=False)
+
+    def band(self, value):
+        return bisect_right(self.bounds, value)
+
+    def lookup(self, value):
+        return self.outcomes[bisect_right(self.bounds, value)]
+
+    def bands(self, values):
+        """Band index of every element of values"""
+        return np.searchsorted(self.bounds_array, values, side="right")
+
+
+_interned = {}
+
+
+def _intern(payload):
+    """One shared tuple per distinct recommendation list"""
+    payload = tuple(payload)
+    return _interned.setdefault(payload, payload)
+
+
+SEVERITY = DecisionTable(**RULES["severity"])
+RISK = DecisionTable(**RULES["risk"])
+
+# (category, title, table) in reporting order
+RECOMMENDATIONS = tuple(
+    (category, rule["title"], DecisionTable(rule["bounds"], [_intern(outcome) for outcome in rule["outcomes"]]))
+    for category, rule in RULES["recommendations"].items()
+)
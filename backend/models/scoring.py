@@ -0,0 +1,109 @@
+import numpy as np
+
+from models.rules import RISK
+
+# Bump whenever the scoring below changes so cached reports are not reused
+SCORING_VERSION = 1
+
+# Indicator thresholds used by the dyslexia report; a session scores on an
+# indicator once its metric passes the threshold
+REPORT_THRESHOLDS = {
+    "facial_expressions": 30,   # confused + frustrated percentage above
+    "reading_speed": 120,       # words per minute below
+    "hesitations": 5,           # hesitations above
+    "pronunciation": 3,         # pronunciation errors above
+    "regressions": 20,          # regression percentage above
+}
+
+# Largest contribution of each indicator; they add up to 100
+INDICATOR_MAX_SCORES = {
+    "facial_expressions": 25,
+    "reading_speed": 20,
+    "hesitations": 15,
+    "pronunciation": 15,
+    "regressions": 25,
+}
+
+# The session metrics the likelihood score depends on
+METRIC_FIELDS = (
+    "confused_percent",
+    "frustrated_percent",
+    "reading_speed",
+    "hesitations",
+    "pronunciation_errors",
+    "regressions_percentage",
+)
+
+
+def extract_metrics(facial_data, audio_data, eye_data):
+    """Pull the scoring metrics out of one session's analysis results"""
+    expressions = facial_data.get("expressions", {}) if facial_data else {}
+    audio_data = audio_data or {}
+    return {
+        "confused_percent": expressions.get("confused", 0),
+        "frustrated_percent": expressions.get("frustrated", 0),
+        "reading_speed": audio_data.get("reading_speed", 0),
+        "hesitations": audio_data.get("hesitations", 0),
+        "pronunciation_errors": audio_data.get("pronunciation_errors", 0),
+        "regressions_percentage": eye_data.get("regressions_percentage", 0) if eye_data else 0,
+    }
+
+
+def metrics_columns(rows):
+    """Turn a list of metric dicts (as from extract_metrics) into one float64 array per metric"""
+    return {
+        field: np.fromiter((row.get(field, 0) for row in rows), dtype=np.float64, count=len(rows))
+        for field in METRIC_FIELDS
+    }
+
+
+def score_batch(columns, thresholds=None):
+    """
+    Score many sessions at once from metric columns.
+
+    Vectorized counterpart of generate_dyslexia_analysis_report's scoring:
+    for the same thresholds every likelihood, risk level, confidence and
+    indicator score is identical to the per-session result. Indicator
+    scores are 0 where an indicator did not fire; `fired` holds the masks.
+    """
+    thresholds = {**REPORT_THRESHOLDS, **(thresholds or {})}
+    caps = INDICATOR_MAX_SCORES
+    expression_percent = columns["confused_percent"] + columns["frustrated_percent"]
+
+    # Same arithmetic, in the same order, as the scalar report
+    raw_scores = {
+        "facial_expressions": (expression_percent > thresholds["facial_expressions"],
+                               np.minimum(caps["facial_expressions"], expression_percent - thresholds["facial_expressions"])),
+        "reading_speed": (columns["reading_speed"] < thresholds["reading_speed"],
+                          np.minimum(caps["reading_speed"], (thresholds["reading_speed"] - columns["reading_speed"]) / 2)),
+        "hesitations": (columns["hesitations"] > thresholds["hesitations"],
+                        np.minimum(caps["hesitations"], (columns["hesitations"] - thresholds["hesitations"]) * 2)),
+        "pronunciation": (columns["pronunciation_errors"] > thresholds["pronunciation"],
+                          np.minimum(caps["pronunciation"], (columns["pronunciation_errors"] - thresholds["pronunciation"]) * 3)),
+        "regressions": (columns["regressions_percentage"] > thresholds["regressions"],
+                        np.minimum(caps["regressions"], (columns["regressions_percentage"] - thresholds["regressions"]) * 1.5)),
+    }
+
+    total_score = np.zeros(len(expression_percent))
+    indicator_scores = {}
+    fired = {}
+    for name, (mask, score) in raw_scores.items():
+        indicator_scores[name] = np.where(mask, score, 0.0)
+        fired[name] = mask
+        total_score = total_score + indicator_scores[name]
+
+    max_possible_score = sum(caps.values())
+    likelihood = (total_score / max_possible_score) * 100
+
+    levels, confidence_caps, confidence_bases, band_starts = (np.asarray(column) for column in zip(*RISK.outcomes))
+    bands = RISK.bands(likelihood)
+    risk_level = levels[bands]
+    confidence = np.minimum(confidence_caps[bands], confidence_bases[bands] + (likelihood - band_starts[bands]))
+
+    return {
+        "dyslexia_likelihood_percentage": likelihood,
+        "risk_level": risk_level,
+        "confidence_percentage": confidence,
+        "indicator_scores": indicator_scores,
+        "fired": fired,
+    }
@@ -0,0 +1,152 @@
+import os
+import threading
+import uuid
+
+import cv2
+
+from models.dyslexia_system import DyslexiaAnalysisSystem
+
+
+class NoDeviceAvailable(Exception):
+    """Raised when every device of a kind is already leased"""
+
+
+class DevicePool:
+    """
+    Hands out capture devices (camera or microphone indexes) with explicit ownership.
+
+    A device can only be leased by one owner at a time, and only its owner
+    can give it back, so one session can never release another's camera.
+    device_indexes may also be a function returning them, called on first
+    use so devices are not probed at import time.
+    """
+
+    def __init__(self, kind, device_indexes):
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._device_indexes = device_indexes
+        self._owner_map = None
+
+    @property
+    def _owners(self):
+        # Called with self._lock held
+        if self._owner_map is None:
+            indexes = self._device_indexes() if callable(self._device_indexes) else self._device_indexes
+            self._owner_map = {index: None for index in indexes}
+        return self._owner_map
+
+    def acquire(self, owner):
+        """Lease the first free device to owner"""
+        with self._lock:
+            for index, current_owner in self._owners.items():
+                if current_owner is None:
+                    self._owners[index] = owner
+                    return index
+        raise NoDeviceAvailable(f"No free {self.kind} available")
+
+    def release(self, index, owner):
+        """Return a device to the pool; ignored unless owner holds the lease"""
+        with self._lock:
+            if self._owners.get(index) == owner:
+                self._owners[index] = None
+                return True
+        return False
+
+    def owner_of(self, index):
+        with self._lock:
+            return self._owners.get(index)
+
+    def available(self):
+        with self._lock:
+            return sum(1 for owner in self._owners.values() if owner is None)
+
+
+def probe_cameras(candidates=(0, 1)):
+    """
+    The candidate camera indexes that can be opened, like the old fallback
+    from camera 0 to camera 1. If none open, all candidates are kept so
+    sessions report the camera error themselves.
+    """
+    found = []
+    for index in candidates:
+        camera = cv2.VideoCapture(index)
+        try:
+            if camera.isOpened():
+                found.append(index)
+        finally:
+            camera.release()
+    print(f"Cameras available for analysis sessions: {found or 'none'}")
+    return found or list(candidates)
+
+
+def _parse_indexes(value, default):
+    """Parse a comma separated list of device indexes; 'default' means the system default device"""
+    if not value:
+        return default
+    return [None if item.strip() == "default" else int(item) for item in value.split(",") if item.strip()]
+
+
+class AnalysisSession:
+    """One client's isolated analysis state and the devices it has leased"""
+
+    def __init__(self, session_id, system, camera_index, microphone_index):
+        self.session_id = session_id
+        self.system = system
+        self.camera_index = camera_index
+        self.microphone_index = microphone_index
+
+
+class AnalysisSessionManager:
+    """Creates one DyslexiaAnalysisSystem per connection, backed by leased devices"""
+
+    def __init__(self, camera_pool=None, microphone_pool=None, headless=None):
+        # ANALYSIS_CAMERA_INDEXES lists the cameras to lease; without it cameras 0 and 1 are probed
+        self.camera_pool = camera_pool or DevicePool(
+            "camera", _parse_indexes(os.getenv("ANALYSIS_CAMERA_INDEXES"), probe_cameras))
+        # The default input device can only serve one session at a time
+        self.microphone_pool = microphone_pool or DevicePool(
+            "microphone", _parse_indexes(os.getenv("ANALYSIS_MICROPHONE_INDEXES"), [None]))
+        # Sessions run without any GUI work unless ANALYSIS_HEADLESS=0
+        self.headless = headless if headless is not None else os.getenv("ANALYSIS_HEADLESS", "1") != "0"
+        self._lock = threading.Lock()
+        self.sessions = {}
+
+    def open(self, frame_source="camera"):
+        """
+        Build a session; camera sessions lease a camera and microphone first.
+
+        Client sessions receive frames from the browser and lease no devices.
+        """
+        session_id = uuid.uuid4().hex
+        if frame_source == "client":
+            system = DyslexiaAnalysisSystem(headless=True, frame_source="client")
+            return self._register(AnalysisSession(session_id, system, None, None))
+
+        camera_index = self.camera_pool.acquire(session_id)
+        try:
+            microphone_index = self.microphone_pool.acquire(session_id)
+        except NoDeviceAvailable:
+            self.camera_pool.release(camera_index, session_id)
+            raise
+
+        system = DyslexiaAnalysisSystem(camera_index=camera_index, microphone_index=microphone_index, headless=self.headless)
+        return self._register(AnalysisSession(session_id, system, camera_index, microphone_index))
+
+    def _register(self, session):
+        with self._lock:
+            self.sessions[session.session_id] = session
+        return session
+
+    def close(self, session):
+        """Stop capture, release the session's own devices and forget it"""
+        system = session.system
+        system.stop_event.set()
+        if system.recording:
+            system.stop_audio_recording()
+        system.release_camera()
+
+        system.frame_buffer.close()
+        self.camera_pool.release(session.camera_index, session.session_id)
+        self.microphone_pool.release(session.microphone_index, session.session_id)
+        with self._lock:
+            self.sessions.pop(session.session_id, None)
@@ -0,0 +1,223 @@
+import hashlib
+import io
+import json
+import threading
+from xml.sax.saxutils import escape
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
+
+
+def chart_spec(facial_data, audio_data, eye_data, report):
+    """
+    Describe the four report charts as plain data.
+
+    Each chart has a `slot` (1-4, its position in a 2x2 grid) and is either
+    a bar chart (labels, values, color, y_label, optional y_max) or a gauge
+    (value, label, color). This is what the PNG and SVG renderers draw, and
+    what clients can draw themselves.
+    """
+    charts = []
+
+    # 1. Facial Expression Analysis
+    expressions = facial_data.get("expressions", {}) if facial_data else {}
+    if expressions:
+        charts.append({
+            "slot": 1, "type": "bar", "title": "Facial Expression Analysis", "y_label": "Percentage (%)",
+            "y_max": None, "color": "skyblue",
+            "labels": list(expressions.keys()), "values": [round(value, 1) for value in expressions.values()]
+        })
+
+    # 2. Audio Analysis
+    if audio_data:
+        charts.append({
+            "slot": 2, "type": "bar", "title": "Audio Analysis", "y_label": "Score (%)", "y_max": 100, "color": "lightgreen",
+            "labels": ["Fluency", "Speech Clarity", "Reading Rhythm", "Overall Score"],
+            "values": [round(audio_data.get(key, 0), 1) for key in
+                       ("fluency_score", "speech_clarity_percentage", "reading_rhythm_score", "overall_audio_score")]
+        })
+
+    # 3. Eye Tracking Analysis
+    if eye_data:
+        charts.append({
+            "slot": 3, "type": "bar", "title": "Eye Movement Analysis", "y_label": "Percentage (%)", "y_max": 100, "color": "salmon",
+            "labels": ["Fixations", "Regressions", "Saccades", "Efficiency"],
+            "values": [round(eye_data.get(key, 0), 1) for key in
+                       ("fixations_percentage", "regressions_percentage", "saccades_percentage", "reading_efficiency_score")]
+        })
+
+    # 4. Overall Dyslexia Likelihood
+    if report:
+        likelihood = report.get('dyslexia_likelihood_percentage', 0)
+        confidence = report.get('confidence_percentage', 0)
+        charts.append({
+            "slot": 4, "type": "gauge", "title": f"Dyslexia Likelihood (Confidence: {confidence:.1f}%)",
+            "value": round(likelihood, 1), "label": report.get('risk_level', 'Unknown'),
+            "color": 'red' if likelihood > 60 else 'orange' if likelihood > 30 else 'green'
+        })
+
+    return {"version": 1, "charts": charts}
+
+
+def render_report_png(facial_data, audio_data, eye_data, report):
+    """
+    Draw the four report charts and return them as PNG bytes.
+
+    Uses a standalone Figure with its own Agg canvas instead of pyplot, so
+    there is no global figure state and any number of threads can render
+    at the same time.
+    """
+    fig = Figure(figsize=(15, 10))
+    FigureCanvasAgg(fig)
+
+    for chart in chart_spec(facial_data, audio_data, eye_data, report)["charts"]:
+        ax = fig.add_subplot(2, 2, chart["slot"])
+        if chart["type"] == "bar":
+            ax.bar(chart["labels"], chart["values"], color=chart["color"])
+            ax.set_title(chart["title"])
+            ax.set_ylabel(chart["y_label"])
+            if chart["y_max"] is not None:
+                ax.set_ylim(0, chart["y_max"])
+            else:
+                for label in ax.get_xticklabels():
+                    label.set_rotation(45)
+                    label.set_horizontalalignment('right')
+        else:
+            # Gauge chart showing dyslexia likelihood
+            ax.pie([chart["value"], 100 - chart["value"]], labels=['Likelihood', ''], colors=[chart["color"], 'lightgrey'],
+                   startangle=90, counterclock=False)
+            ax.add_patch(Circle((0, 0), 0.7, fc='white'))
+            ax.text(0, 0, f"{chart['value']:.1f}%\n{chart['label']}", ha='center', va='center', fontsize=16)
+            ax.set_title(chart["title"])
+
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+# Prebuilt SVG fragments; a 2x2 grid of 450x300 panels
+SVG_DOCUMENT = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 900 600" font-family="sans-serif" font-size="12">'
+    '<rect width="900" height="600" fill="white"/>{panels}</svg>'
+)
+SVG_PANEL = '<g transform="translate({x},{y})"><text x="225" y="22" text-anchor="middle" font-size="14">{title}</text>{body}</g>'
+SVG_BAR = (
+    '<rect x="{x:.1f}" y="{y:.1f}" width="{width:.1f}" height="{height:.1f}" fill="{color}"/>'
+    '<text x="{center:.1f}" y="272" text-anchor="middle">{label}</text>'
+)
+SVG_AXIS = (
+    '<line x1="50" y1="40" x2="50" y2="255" stroke="black"/><line x1="50" y1="255" x2="430" y2="255" stroke="black"/>'
+    '<text x="44" y="255" text-anchor="end">0</text><text x="44" y="44" text-anchor="end">{y_max:g}</text>'
+)
+SVG_GAUGE = (
+    '<circle cx="225" cy="155" r="90" fill="none" stroke="lightgrey" stroke-width="36"/>'
+    '<circle cx="225" cy="155" r="90" fill="none" stroke="{color}" stroke-width="36" '
+    'stroke-dasharray="{filled:.1f} {length}" transform="rotate(-90 225 155)"/>'
+    '<text x="225" y="152" text-anchor="middle" font-size="20">{value:.1f}%</text>'
+    '<text x="225" y="175" text-anchor="middle" font-size="14">{label}</text>'
+)
+# Circumference of the gauge ring (2 * pi * 90)
+SVG_GAUGE_LENGTH = 565.5
+
+
+def render_report_svg(spec):
+    """Fill the SVG templates from a chart_spec(); a few kilobytes, no plotting library involved"""
+    panels = []
+    for chart in spec["charts"]:
+        x, y = 450 * ((chart["slot"] - 1) % 2), 300 * ((chart["slot"] - 1) // 2)
+        if chart["type"] == "bar":
+            values = chart["values"]
+            y_max = chart["y_max"] or max([*values, 1])
+            slot_width = 380 / max(1, len(values))
+            body = [SVG_AXIS.format(y_max=y_max)]
+            for index, (label, value) in enumerate(zip(chart["labels"], values)):
+                height = 215 * max(0, min(value, y_max)) / y_max
+                body.append(SVG_BAR.format(
+                    x=50 + index * slot_width + slot_width * 0.15, y=255 - height, width=slot_width * 0.7,
+                    height=height, color=chart["color"], center=50 + (index + 0.5) * slot_width, label=escape(str(label))
+                ))
+            body = "".join(body)
+        else:
+            body = SVG_GAUGE.format(
+                color=chart["color"], length=SVG_GAUGE_LENGTH, filled=SVG_GAUGE_LENGTH * max(0, min(chart["value"], 100)) / 100,
+                value=chart["value"], label=escape(str(chart["label"]))
+            )
+        panels.append(SVG_PANEL.format(x=x, y=y, title=escape(chart["title"]), body=body))
+    return SVG_DOCUMENT.format(panels="".join(panels))
+
+
+# Keys of a report that describe its chart rather than its content
+VISUALIZATION_FIELDS = ("visualization_id", "visualization_url", "chart_spec", "visualization_svg")
+
+
+def visualization_id(facial_data, audio_data, eye_data, report):
+    """Content hash of everything a chart is drawn from; identical reports share one chart"""
+    report = {key: value for key, value in (report or {}).items() if key not in VISUALIZATION_FIELDS}
+    payload = json.dumps([facial_data, audio_data, eye_data, report], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class VisualizationRenderer:
+    """
+    Renders report charts off the request path.
+
+    submit() only hashes the inputs and queues the render on a bounded
+    executor; the PNG is saved once in the artifact store, under a key
+    derived from the chart id, and then reused. A chart that
+    is fetched before the background render ran is rendered right away by
+    ensure(), and never twice; a chart whose render failed is dropped.
+    """
+
+    def __init__(self, store, executor):
+        self.store = store
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def key_for(self, chart_id):
+        return f"dyslexia_analysis_{chart_id}.png"
+
+    def submit(self, facial_data, audio_data, eye_data, report):
+        """Register a chart for rendering and return its id immediately"""
+        chart_id = visualization_id(facial_data, audio_data, eye_data, report)
+        if self.store.exists(self.key_for(chart_id)):
+            return chart_id
+
+        with self._lock:
+            if chart_id in self._pending:
+                return chart_id
+            self._pending[chart_id] = {
+                "inputs": (facial_data, audio_data, eye_data, report),
+                "lock": threading.Lock()
+            }
+        self.executor.submit(self.ensure, chart_id)
+        return chart_id
+
+    def ensure(self, chart_id):
+        """Return the path of a rendered chart, rendering it now if needed; None if unknown"""
+        key = self.key_for(chart_id)
+        path = self.store.path_for(key)
+        with self._lock:
+            job = self._pending.get(chart_id)
+        if job is None:
+            return path if self.store.exists(key) else None
+
+        with job["lock"]:
+            # A render that failed while this call waited is not retried
+            if job.get("failed"):
+                return None
+            try:
+                if not self.store.exists(key):
+                    png = render_report_png(*job["inputs"])
+                    self.store.put_bytes(key, png, "image/png", visualization_id=chart_id)
+            except Exception as e:
+                print(f"Error generating visualizations: {str(e)}")
+                job["failed"] = True
+                return None
+            finally:
+                # Rendered or failed, the chart is no longer pending; later requests see the PNG or a 404
+                with self._lock:
+                    self._pending.pop(chart_id, None)
+        return path
@@ -0,0 +1,62 @@
+# responses.py - JSON encoding of API responses and Mongo documents
+from bson.objectid import ObjectId
+from datetime import datetime
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from typing import Any, Dict, Iterable, List, Type
+import orjson
+
+# datetimes are encoded natively (ISO 8601, like datetime.isoformat()); NumPy scalars and arrays as numbers
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> str:
+    """Encode ObjectIds as strings; any other type orjson cannot encode is an error"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        # Only reached for datetime subclasses orjson does not encode natively
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """The app's default response class: orjson, plus ObjectIds and NumPy values"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class DocumentView:
+    """
+    Mongo projection and conversion for one response model.
+
+    Each model field names the document key it is read from (its
+    validation alias, e.g. "_id") and the key it is written to (its
+    serialization alias, or its name). projection fetches only those keys,
+    and convert() builds the response dict in a single pass over the
+    fields; ObjectIds and datetimes are left for the response class to
+    encode. Fields missing from a document are left out, as they were
+    before the models existed.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields = tuple(
+            (field.validation_alias or field.alias or name, field.serialization_alias or field.alias or name)
+            for name, field in model.model_fields.items()
+        )
+        self.projection = {source: 1 for source, _ in self.fields}
+        if "_id" not in self.projection:
+            self.projection["_id"] = 0
+
+    def convert(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        return {target: document[source] for source, target in self.fields if source in document}
+
+    def convert_many(self, documents: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        convert = self.convert
+        return [convert(document) for document in documents]
@@ -0,0 +1,34 @@
+import numpy as np
+
+from models.gaze import GazeBuffer, classify_gaze
+
+
+def _stationary_reader(seconds=20, fps=30, dropout=0.3, seed=0):
+    """Both eyes fixed on one point with detector jitter; each eye is missed at random"""
+    rng = np.random.default_rng(seed)
+    gaze = GazeBuffer()
+    for frame in range(seconds * fps):
+        t = frame / fps
+        for eye_id, (x, y) in enumerate(((300.0, 200.0), (360.0, 202.0))):
+            if rng.random() < dropout:
+                continue
+            gaze.append(t, x + rng.normal(0, 0.3), y + rng.normal(0, 0.3), eye_id)
+    return gaze.samples
+
+
+def test_stationary_gaze_with_dropouts_has_no_saccades():
+    movements = classify_gaze(_stationary_reader())
+    assert len(movements["saccade_amplitudes"]) == 0
+    assert movements["regressions"] == 0
+    assert len(movements["fixation_durations"]) > 0
+
+
+def test_leftward_jump_is_a_regression():
+    gaze = GazeBuffer()
+    for frame in range(60):
+        x = 400.0 if frame < 30 else 250.0
+        for eye_id, offset in enumerate((0.0, 60.0)):
+            gaze.append(frame / 30, x + offset, 200.0, eye_id)
+    movements = classify_gaze(gaze.samples)
+    assert len(movements["saccade_amplitudes"]) == 1
+    assert movements["regressions"] == 1
@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+from models.parents import QuestionBank, read_responses_csv, read_responses_json
+
+BANK = QuestionBank({
+    "categories": {"reading": "Reading"},
+    "questions": [{"id": "q1", "category": "reading"}, {"id": "q2", "category": "reading"}],
+})
+
+
+@pytest.mark.parametrize("cell", ["nan", "inf", "-1", "100.5"])
+def test_csv_rejects_values_outside_range(cell):
+    text = f"child_name,child_age,q1,q2\na,7,50,\nb,8,{cell},25\n"
+    with pytest.raises(ValueError, match="Line 3: response q1"):
+        read_responses_csv(text, BANK)
+
+
+def test_csv_empty_cell_is_unanswered():
+    _, ages, values = read_responses_csv("child_name,child_age,q1,q2\na,7,0,\n", BANK)
+    assert ages == [7]
+    assert values[0, 0] == 0 and math.isnan(values[0, 1])
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), -0.5, 101])
+def test_json_rejects_values_outside_range(value):
+    children = [{"child_name": "a", "responses": {"q1": 100}}, {"child_name": "b", "responses": {"q2": value}}]
+    with pytest.raises(ValueError, match="Child 1: response q2"):
+        read_responses_json(children, BANK)
+
+
+@pytest.mark.parametrize("child", [
+    {"child_age": 7},
+    {"child_name": 5, "child_age": 7},
+    {"child_name": "x" * 101, "child_age": 7},
+    {"child_name": "K", "child_age": "7"},
+    {"child_name": "K", "child_age": 30},
+    {"child_name": "K", "child_age": True},
+])
+def test_json_rejects_invalid_child_details(child):
+    with pytest.raises(ValueError, match="Child 0: child_"):
+        read_responses_json([{**child, "responses": {"q1": 50}}], BANK)
+
+
+def test_csv_rejects_out_of_range_age():
+    with pytest.raises(ValueError, match="Line 2: child_age"):
+        read_responses_csv("child_name,child_age,q1\na,40,50\n", BANK)
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+import numpy as np
+import orjson
+import pytest
+from bson.objectid import ObjectId
+
+from responses import dumps
+
+
+def test_object_ids_datetimes_and_numpy_values_are_encoded():
+    oid = ObjectId()
+    encoded = orjson.loads(dumps({"_id": oid, "date": datetime(2025, 1, 2, 3, 4, 5), "score": np.float64(1.5)}))
+    assert encoded == {"_id": str(oid), "date": "2025-01-02T03:04:05", "score": 1.5}
+
+
+def test_unknown_types_are_an_error():
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
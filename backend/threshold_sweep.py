@@ -0,0 +1,80 @@
+# threshold_sweep.py - Re-score the stored cohort over a grid of report thresholds
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import itertools
+import time
+
+import numpy as np
+
+from database import Database
+from models.scoring import REPORT_THRESHOLDS, metrics_columns, score_batch
+
+
+def sweep(columns: Dict[str, np.ndarray], grid: Dict[str, List[float]]) -> List[Dict[str, Any]]:
+    """
+    Score every session once per threshold combination in grid.
+
+    Each row reports the combination, the mean likelihood, the number of
+    sessions per risk level and how many sessions changed risk level
+    compared to the current REPORT_THRESHOLDS.
+    """
+    baseline = score_batch(columns)["risk_level"]
+    names = list(grid)
+    rows = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        thresholds = dict(zip(names, values))
+        scored = score_batch(columns, thresholds)
+        likelihood = scored["dyslexia_likelihood_percentage"]
+        risk_level = scored["risk_level"]
+        rows.append({
+            "thresholds": {**REPORT_THRESHOLDS, **thresholds},
+            "mean_likelihood": float(likelihood.mean()) if len(likelihood) else 0.0,
+            "high": int(np.count_nonzero(risk_level == "High")),
+            "moderate": int(np.count_nonzero(risk_level == "Moderate")),
+            "low": int(np.count_nonzero(risk_level == "Low")),
+            "changed": int(np.count_nonzero(risk_level != baseline)),
+        })
+    return rows
+
+
+def _parse_values(text: str) -> List[float]:
+    return [float(value) for value in text.split(",") if value.strip()]
+
+
+async def _main(grid: Dict[str, List[float]]) -> int:
+    db = Database()
+    try:
+        await db.connect()
+        rows = await db.analysis_results.find_metrics()
+    finally:
+        await db.close()
+
+    if not rows:
+        print("No stored analysis results with metrics")
+        return 1
+
+    started = time.perf_counter()
+    columns = metrics_columns(rows)
+    results = sweep(columns, grid)
+    elapsed = time.perf_counter() - started
+
+    names = list(REPORT_THRESHOLDS)
+    print("\t".join(names + ["mean_likelihood", "high", "moderate", "low", "changed"]))
+    for row in results:
+        print("\t".join([f"{row['thresholds'][name]:g}" for name in names] +
+                        [f"{row['mean_likelihood']:.1f}", str(row["high"]), str(row["moderate"]), str(row["low"]), str(row["changed"])]))
+    print(f"Scored {len(rows)} sessions x {len(results)} threshold sets in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Re-score stored analysis results over a grid of report thresholds")
+    for name, default in REPORT_THRESHOLDS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=_parse_values, default=[default],
+                            help=f"comma separated values to try (current: {default})")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main({name: getattr(args, name) for name in REPORT_THRESHOLDS})))
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { Brain, AlertCircle, CheckCircle2, XCircle, RotateCcw, BarChart2, Activity, Target, Download, Share, ChevronRight } from 'lucide-react';
+import { Bar, Doughnut } from 'react-chartjs-2';
 
 interface AnalysisProgress {
   stage: string;
@@ -8,6 +9,32 @@ interface AnalysisProgress {
   percent: number;
 }
 
+// Chart data sent by the server instead of a rendered image (visualization: 'spec')
+interface BarChartSpec {
+  slot: number;
+  type: 'bar';
+  title: string;
+  y_label: string;
+  y_max: number | null;
+  color: string;
+  labels: string[];
+  values: number[];
+}
+
+interface GaugeChartSpec {
+  slot: number;
+  type: 'gauge';
+  title: string;
+  value: number;
+  label: string;
+  color: string;
+}
+
+interface ChartSpec {
+  version: number;
+  charts: (BarChartSpec | GaugeChartSpec)[];
+}
+
 interface AnalysisResults {
   dyslexia_likelihood_percentage: number;
   risk_level: string;
@@ -18,6 +45,8 @@ interface AnalysisResults {
     challenges: string[];
   };
   visualization_url?: string;
+  chart_spec?: ChartSpec;
+  visualization_svg?: string;
 }
 
 interface ResultsProps {
@@ -28,6 +57,39 @@ interface ResultsProps {
   analysisProgress: AnalysisProgress;
 }
 
+const SpecChart: React.FC<{ chart: BarChartSpec | GaugeChartSpec }> = ({ chart }) => {
+  if (chart.type === 'gauge') {
+    return (
+      <div className="relative">
+        <Doughnut
+          data={{
+            labels: ['Likelihood', ''],
+            datasets: [{ data: [chart.value, 100 - chart.value], backgroundColor: [chart.color, 'lightgrey'], borderWidth: 0 }]
+          }}
+          options={{ cutout: '70%', plugins: { legend: { display: false }, title: { display: true, text: chart.title, color: '#fff' } } }}
+        />
+        <div className="absolute inset-0 flex flex-col items-center justify-center pt-8 pointer-events-none">
+          <span className="text-2xl font-bold text-white">{chart.value.toFixed(1)}%</span>
+          <span className="text-gray-400">{chart.label}</span>
+        </div>
+      </div>
+    );
+  }
+
+  return (
+    <Bar
+      data={{
+        labels: chart.labels,
+        datasets: [{ label: chart.y_label, data: chart.values, backgroundColor: chart.color }]
+      }}
+      options={{
+        scales: { y: { beginAtZero: true, max: chart.y_max ?? undefined } },
+        plugins: { legend: { display: false }, title: { display: true, text: chart.title, color: '#fff' } }
+      }}
+    />
+  );
+};
+
 const Results: React.FC<ResultsProps> = ({ results, loading, error, onReset, analysisProgress }) => {
   const [showDetails, setShowDetails] = useState(false);
 
@@ -304,6 +366,34 @@ const Results: React.FC<ResultsProps> = ({ results, loading, error, onReset, ana
                 </div>
               </motion.div>
             </div>
+
+            {/* Charts, drawn here from the server's chart spec or shown from its inline SVG */}
+            {(results.chart_spec || results.visualization_svg) && (
+              <motion.div
+                initial={{ opacity: 0, y: 20 }}
+                animate={{ opacity: 1, y: 0 }}
+                transition={{ delay: 0.7 }}
+                className="p-8 rounded-2xl bg-gray-800/50 border border-gray-700/50 backdrop-blur-lg"
+              >
+                {results.chart_spec ? (
+                  <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
+                    {[...results.chart_spec.charts]
+                      .sort((a, b) => a.slot - b.slot)
+                      .map((chart) => (
+                        <div key={chart.slot} className="bg-gray-700/30 p-4 rounded-xl">
+                          <SpecChart chart={chart} />
+                        </div>
+                      ))}
+                  </div>
+                ) : (
+                  <img
+                    src={`data:image/svg+xml;charset=utf-8,${encodeURIComponent(results.visualization_svg ?? '')}`}
+                    alt="Analysis charts"
+                    className="w-full rounded-xl"
+                  />
+                )}
+              </motion.div>
+            )}
           </>
         )}
       </AnimatePresence>
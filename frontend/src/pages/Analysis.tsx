@@ -299,7 +299,9 @@ const Analysis: React.FC = () => {
           method: 'POST',
           headers: {
             'Content-Type': 'application/json',
-          }
+          },
+          // Charts come back as data and are drawn in the browser
+          body: JSON.stringify({ visualization: 'spec' })
         });
 
         if (!response.ok) {
@@ -318,7 +320,7 @@ const Analysis: React.FC = () => {
         
         wsRef.current.onopen = (): void => {
           if (wsRef.current) {
-            wsRef.current.send(JSON.stringify({ command: 'start' }));
+            wsRef.current.send(JSON.stringify({ command: 'start', visualization: 'spec' }));
           }
         };
         